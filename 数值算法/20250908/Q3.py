@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from trsm import trsm
+
 
 #递归回代，自底向上逐层收缩矩阵
 def solution1(U,b):
@@ -28,9 +30,11 @@ def generate(n):
     return U,b
 
 
-print("输入要生成的上三角矩阵维数")
-n = int(input("请输入一个整数: "))
-U,b=generate(n)
-U,b=solution2(U,b)
-col_b=np.column_stack([b])
-print(f"{col_b}")
\ No newline at end of file
+if __name__ == "__main__":
+    print("输入要生成的上三角矩阵维数")
+    n = int(input("请输入一个整数: "))
+    U,b=generate(n)
+    # 分块回代，就地覆盖 b（solution1 在 n≈1000 时超出递归深度）
+    b=trsm(U,b)
+    col_b=np.column_stack([b])
+    print(f"{col_b}")
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+from scipy.linalg import solve_triangular
+
+
+def _diag_block(T, B, lower, unit_diagonal):
+    """解对角块 T X = B（就地），直接调用 LAPACK 三角求解 trtrs"""
+    B[:] = solve_triangular(T, B, lower=lower, unit_diagonal=unit_diagonal, overwrite_b=True, check_finite=False)
+
+
+def trsm(T, B, lower=False, trans=False, unit_diagonal=False, nb=64):
+    """分块三角求解 op(T) X = B，结果就地写回 B 并返回。
+
+    T: (n, n) 三角矩阵，只读取 lower 指定的那一半；trans=True 时解 T^T X = B。
+    B: (n,) 或 (n, k)，须为可写的浮点数组。
+    对角块一次求解，对角块之外的部分以矩阵乘法 B_i -= T_ij X_j 一次更新。
+    """
+    T = np.asarray(T)
+    if trans:
+        T, lower = T.T, not lower
+    X = B[:, None] if B.ndim == 1 else B
+    n = T.shape[0]
+    if X.shape[0] != n:
+        raise ValueError("T 与 B 的行数不一致")
+    if not unit_diagonal and np.any(np.diagonal(T) == 0):
+        raise np.linalg.LinAlgError("三角矩阵奇异")
+
+    starts = range(0, n, nb) if lower else range((n - 1) // nb * nb, -1, -nb)
+    for i0 in starts:
+        i1 = min(i0 + nb, n)
+        _diag_block(T[i0:i1, i0:i1], X[i0:i1], lower, unit_diagonal)
+        if lower:
+            X[i1:] -= T[i1:, i0:i1] @ X[i0:i1]
+        else:
+            X[:i0] -= T[:i0, i0:i1] @ X[i0:i1]
+    return B
+
+
+if __name__ == "__main__":
+    def solution2(U, b):
+        # 与 Q3.solution2 相同的逐行回代，作对照
+        for i in range(len(b) - 1, -1, -1):
+            b[i] = (b[i] - U[i, i + 1:] @ b[i + 1:]) / U[i, i]
+        return U, b
+
+    rng = np.random.default_rng(0)
+
+    # 正确性：四种 (lower, trans) 组合及单位对角
+    n, k = 300, 5
+    L = np.tril(rng.standard_normal((n, n)), -1) / n + np.diag(1 + rng.random(n))
+    B = rng.standard_normal((n, k))
+    for lower in (True, False):
+        T = L if lower else L.T.copy()
+        for trans in (False, True):
+            for unit in (False, True):
+                X = trsm(T, B.copy(), lower=lower, trans=trans, unit_diagonal=unit, nb=32)
+                ref = solve_triangular(T, B, lower=lower, trans=trans, unit_diagonal=unit)
+                print(f"lower={lower!s:5} trans={trans!s:5} unit={unit!s:5}: 误差 {np.max(np.abs(X - ref)):.1e}")
+
+    # 速度：与逐行回代 solution2、LAPACK trtrs 比较
+    for n, k in ((1000, 1), (2000, 1), (2000, 64), (4000, 64)):
+        U = np.triu(rng.standard_normal((n, n))) + n ** 0.5 * np.eye(n)
+        B = rng.standard_normal((n, k))
+        t0 = time.perf_counter()
+        X = trsm(U, B.copy())
+        t1 = time.perf_counter()
+        ref = solve_triangular(U, B)
+        t2 = time.perf_counter()
+        line = f"n={n}, k={k}: trsm {t1 - t0:.4f}s, solve_triangular {t2 - t1:.4f}s"
+        if k == 1:
+            t0 = time.perf_counter()
+            solution2(U, B[:, 0].copy())
+            line += f", solution2 {time.perf_counter() - t0:.4f}s"
+        print(line + f", 误差 {np.max(np.abs(X - ref)):.1e}")
@@ -1,10 +1,15 @@
 import numpy as np
 from scipy.linalg import pascal
+
+from structured import pascal_cholesky
 np.set_printoptions(suppress=True, precision=12)
 np.set_printoptions(linewidth=1000)
 n=int(input("输入矩阵维数： "))
-P=pascal(n, kind='symmetric')
-L=np.linalg.cholesky(P)
+# P 的元素最大为 C(2n-2, n-1)，n >= 30 时超过 2^53，改用精确整数
+exact=n>=30
+P=pascal(n, kind='symmetric', exact=exact)
+L=pascal_cholesky(n, exact=exact)
 print("L=\n", L)
 print("L.T=\n",L.T)
-print("L@L.T=\n", L @ L.T)
\ No newline at end of file
+print("L@L.T=\n", L @ L.T)
+print("L@L.T == P:", np.array_equal(L @ L.T, P))
@@ -0,0 +1,154 @@
+"""结构矩阵的 Cholesky 因子与免组装乘法。
+
+对称 Pascal 矩阵 P = L L^T，L[i, j] = C(i, j) 为下三角二项式矩阵；
+Hilbert 矩阵的 Cholesky 因子有闭式；对称正定 Toeplitz 矩阵用 Schur 算法 O(n^2) 分解。
+exact=True 时用 Python 整数 / Fraction（object 数组），不受 2^53 的限制。
+"""
+from fractions import Fraction
+
+import numpy as np
+from scipy.special import gammaln
+
+
+# ---------------- Pascal ----------------
+
+def pascal_cholesky(n, exact=False):
+    """对称 Pascal 矩阵的 Cholesky 因子 L[i, j] = C(i, j)，按 Pascal 三角逐行递推，O(n^2)"""
+    L = np.zeros((n, n), dtype=object if exact else float)
+    if n == 0:
+        return L
+    L[:, 0] = 1
+    for i in range(1, n):
+        L[i, 1:i + 1] = L[i - 1, 1:i + 1] + L[i - 1, :i]
+    return L
+
+
+def pascal_lower_matvec(x, trans=False):
+    """L x 或 L^T x，L 为下三角 Pascal 矩阵，不组装 L，O(n^2) 运算、O(n) 内存。
+    L^T x 是多项式 Σ x_j t^j 的 Taylor 平移 p(t+1)：依次对 x[i:] 取后缀和；
+    L x 是它的转置：i 从 n-2 到 0 依次对 x[i:] 取前缀和。object 数组给出精确整数结果。"""
+    a = np.array(x, dtype=object if np.asarray(x).dtype == object else float)
+    n = a.shape[0]
+    if trans:
+        for i in range(n - 1):
+            a[i:] = np.cumsum(a[i:][::-1], axis=0)[::-1]
+    else:
+        for i in range(n - 2, -1, -1):
+            a[i:] = np.cumsum(a[i:], axis=0)
+    return a
+
+
+def pascal_matvec(x):
+    """对称 Pascal 矩阵乘向量 P x = L (L^T x)"""
+    return pascal_lower_matvec(pascal_lower_matvec(x, trans=True))
+
+
+# ---------------- Hilbert ----------------
+
+def hilbert_cholesky(n):
+    """Hilbert 矩阵 H[i, j] = 1/(i+j-1)（1 起）的 Cholesky 因子闭式
+    L[i, j] = sqrt(2j-1) ((i-1)!)^2 / ((i-j)! (i+j-1)!)，i >= j；用 lgamma 计算避免阶乘溢出"""
+    i, j = np.indices((n, n)) + 1
+    low = i >= j
+    i, j = i[low], j[low]
+    L = np.zeros((n, n))
+    L[low] = np.exp(0.5 * np.log(2 * j - 1) + 2 * gammaln(i) - gammaln(i - j + 1) - gammaln(i + j))
+    return L
+
+
+def hilbert_ldl(n):
+    """Hilbert 矩阵的精确 LDL^T 分解（Fraction），L 为单位下三角，D 为对角元向量"""
+    fact = [1]
+    for k in range(1, 2 * n):
+        fact.append(fact[-1] * k)
+    L = np.zeros((n, n), dtype=object)
+    L[...] = Fraction(0)
+    D = np.empty(n, dtype=object)
+    for j in range(1, n + 1):
+        D[j - 1] = Fraction((2 * j - 1) * fact[j - 1] ** 4, fact[2 * j - 1] ** 2)
+        for i in range(j, n + 1):
+            L[i - 1, j - 1] = Fraction(fact[i - 1] ** 2 * fact[2 * j - 1],
+                                       fact[i - j] * fact[i + j - 1] * fact[j - 1] ** 2)
+    return L, D
+
+
+def hilbert_matvec(x, chunk=1024):
+    """H x，按行分块生成 H 的若干行，内存 O(chunk * n)"""
+    x = np.asarray(x, dtype=float)
+    n = x.shape[0]
+    j = np.arange(n)
+    y = np.empty_like(x)
+    for i0 in range(0, n, chunk):
+        i = np.arange(i0, min(i0 + chunk, n))
+        y[i0:i0 + len(i)] = (1.0 / (i[:, None] + j + 1)) @ x
+    return y
+
+
+# ---------------- Toeplitz ----------------
+
+def toeplitz_cholesky(c):
+    """对称正定 Toeplitz 矩阵（首列 c）的 Cholesky 因子，Schur 算法 O(n^2)。
+    位移 T - Z T Z^T = g1 g1^T - g2 g2^T，每步把 g1 下移一格，
+    再用双曲旋转消去 g2 的当前分量，g1 即为 L 的下一列。"""
+    c = np.asarray(c, dtype=float)
+    n = c.shape[0]
+    if c[0] <= 0:
+        raise np.linalg.LinAlgError("Toeplitz 矩阵非正定")
+    g1 = c / np.sqrt(c[0])
+    g2 = g1.copy()
+    g2[0] = 0.0
+    L = np.zeros((n, n))
+    L[:, 0] = g1
+    for k in range(1, n):
+        u = g1[k - 1:n - 1].copy()  # 下移后的 g1[k:]
+        v = g2[k:]
+        rho = v[0] / u[0]
+        if not abs(rho) < 1:
+            raise np.linalg.LinAlgError("Toeplitz 矩阵非正定")
+        s = np.sqrt((1 - rho) * (1 + rho))
+        g1[k:] = (u - rho * v) / s
+        g2[k:] = (v - rho * u) / s
+        L[k:, k] = g1[k:]
+    return L
+
+
+def toeplitz_matvec(c, x, r=None):
+    """Toeplitz 矩阵（首列 c，首行 r，默认对称 r = c）乘向量，嵌入 2n 阶循环矩阵用 FFT，O(n log n)"""
+    c = np.asarray(c)
+    r = c if r is None else np.asarray(r)
+    x = np.asarray(x)
+    n = c.shape[0]
+    col = np.concatenate((c, [0], r[:0:-1]))
+    pad = np.zeros((2 * n,) + x.shape[1:], dtype=np.result_type(x, float))
+    pad[:n] = x
+    y = np.fft.ifft(np.fft.fft(col)[(slice(None),) + (None,) * (x.ndim - 1)] * np.fft.fft(pad, axis=0), axis=0)[:n]
+    return y if np.iscomplexobj(c) or np.iscomplexobj(x) else y.real
+
+
+if __name__ == "__main__":
+    from scipy.linalg import cholesky, hilbert, pascal, toeplitz
+
+    rng = np.random.default_rng(0)
+
+    n = 12
+    print("Pascal L 与 dense Cholesky 差:", np.max(np.abs(pascal_cholesky(n) - cholesky(pascal(n), lower=True))))
+    print("Hilbert L 与 dense Cholesky 差:", np.max(np.abs(hilbert_cholesky(8) - cholesky(hilbert(8), lower=True))))
+    L, D = hilbert_ldl(n)
+    print("Hilbert 精确 LDL^T 重建正确:", all(sum(L[i, k] * D[k] * L[j, k] for k in range(n)) == Fraction(1, i + j + 1)
+                                        for i in range(n) for j in range(n)))
+
+    c = 0.5 ** np.arange(300)
+    c[0] = 2.0
+    print("Toeplitz L 与 dense Cholesky 差:", np.max(np.abs(toeplitz_cholesky(c) - cholesky(toeplitz(c), lower=True))))
+    x = rng.standard_normal((300, 3))
+    print("Toeplitz FFT 乘法误差:", np.max(np.abs(toeplitz_matvec(c, x) - toeplitz(c) @ x)))
+    print("Hilbert 分块乘法误差:", np.max(np.abs(hilbert_matvec(x, chunk=64) - hilbert(300) @ x)))
+
+    # 大 n：精确整数下 Pascal 的分解和乘法都不受 2^53 的限制
+    n = 200
+    xi = np.array([int(v) for v in rng.integers(-5, 5, n)], dtype=object)
+    y = pascal_matvec(xi)
+    Pn = pascal(n, exact=True)
+    print(f"n={n} 精确 Pascal 乘法正确:", all(y == Pn.dot(xi)), "最大元素位数:", len(str(max(abs(v) for v in y))))
+    Ln = pascal_cholesky(n, exact=True)
+    print(f"n={n} 精确 L L^T == P:", np.array_equal(Ln.dot(Ln.T), Pn))
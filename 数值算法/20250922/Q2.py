@@ -1,33 +1,74 @@
 import numpy as np
-import math
 import matplotlib.pyplot as plt
 
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']  # 用来正常显示中文标签
 plt.rcParams['axes.unicode_minus'] = False
 
-x=np.random.randn(2, 1)
-print(x)
-norm_sq = x[0,0]**2 + x[1,0]**2
-epsilon = 1e-15
-n=int(input("请输入一个整数"))
-pairs=np.zeros((2**n,2))
-for k in range(2**n):
-    θ=2*k*np.pi/2**n
-    A = np.array([[math.cos(θ), math.sin(θ)],
-              [-math.sin(θ), math.cos(θ)]])
-    comp=x.T@A@x
-    exact=norm_sq*math.cos(θ)
-    error=abs(comp-exact)/(abs(exact)+epsilon)
-    pairs[k,0]=k
-    pairs[k,1]=error.item()
-
-
-plt.figure(figsize=(10, 6))
-plt.plot(pairs[:, 0], pairs[:, 1], 'b.', markersize=4)
-plt.yscale('log') # 使用对数坐标更清晰显示微小误差
-plt.xlabel('角度索引 k', fontsize=12)
-plt.ylabel('相对误差（对数尺度）', fontsize=12)
-plt.title(f'相对误差 (n={n})', fontsize=14)
-plt.grid(True, which="both", linestyle='--', linewidth=0.5)
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+DTYPES = (np.float16, np.float32, np.float64, np.longdouble)
+PI = 4 * np.arctan(np.longdouble(1))  # longdouble 精度的 π，np.pi 只有 float64 精度
+
+
+def exact_values(x, n, k):
+    # 精确值 ||x||² cos θ_k，用 longdouble 计算
+    xl = np.ravel(x).astype(np.longdouble)
+    return (xl @ xl) * np.cos(2 * PI / np.longdouble(2) ** n * k.astype(np.longdouble))
+
+
+def angle_errors(x, n, k, dtype=np.float64, epsilon=1e-15, exact=None):
+    """角度 θ_k = 2πk/2^n 下 x^T A(θ) x 的相对误差，k 为整数数组，一次算完。
+    θ、旋转矩阵和二次型都在 dtype 下计算，二次型按 x.T@A@x 的求值顺序 (x^T A) x 逐项展开
+    （matmul 对 float32/float64 走 BLAS 会用 FMA、对 float16 用 float32 累加，末位舍入可能与此略有不同）；
+    exact 为 exact_values 给出的精确值，多种 dtype 共用时由调用方算一次传入。"""
+    x0, x1 = (dtype(v) for v in np.ravel(x))
+    # k/2^n 精确算出后舍入到 dtype，再与 dtype 下的 2π 相乘（k 本身可能超出 float16 的范围）
+    θ = (k / np.longdouble(2) ** n).astype(dtype) * dtype(2 * PI)
+    c, s = np.cos(θ), np.sin(θ)
+    comp = (x0 * c - x1 * s) * x0 + (x0 * s + x1 * c) * x1
+
+    if exact is None:
+        exact = exact_values(x, n, k)
+    return (np.abs(comp.astype(np.longdouble) - exact) / (np.abs(exact) + epsilon)).astype(np.float64)
+
+
+def sweep(x, n, dtypes=DTYPES, bins=4096, chunk=1 << 22):
+    """分块扫描全部 2^n 个角度，内存只与 chunk 有关。
+    每 2^n / bins 个相邻角度合并为一格，只保留格内最大误差（bins 须为 2 的幂）；
+    返回 {dtype 名: 每格最大误差}，以及每格起点的角度索引。"""
+    if bins < 1 or bins & (bins - 1):
+        raise ValueError(f"bins 须为 2 的幂，得到 {bins}")
+    total = 2 ** n
+    width = max(total // bins, 1)
+    chunk = max(chunk // width, 1) * width  # 块边界与格边界对齐
+    out = {np.dtype(d).name: np.empty(total // width) for d in dtypes}
+    for k0 in range(0, total, chunk):
+        k = np.arange(k0, min(k0 + chunk, total), dtype=np.int64)
+        exact = exact_values(x, n, k)  # 每块只算一次，各 dtype 共用
+        for d in dtypes:
+            err = angle_errors(x, n, k, d, exact=exact)
+            out[np.dtype(d).name][k0 // width:(k0 + k.size) // width] = err.reshape(-1, width).max(axis=1)
+    return out, np.arange(0, total, width)
+
+
+def plot_sweep(errors, index, n):
+    plt.figure(figsize=(10, 6))
+    for name, err in errors.items():
+        plt.plot(index, err, '.-' if len(index) < 2 ** n else '-', markersize=4, linewidth=0.8, label=name)
+    plt.yscale('log')  # 使用对数坐标更清晰显示微小误差
+    plt.xlabel('角度索引 k', fontsize=12)
+    ylabel = '相对误差（对数尺度）' if len(index) == 2 ** n else f'每 {2 ** n // len(index)} 个角度的最大相对误差（对数尺度）'
+    plt.ylabel(ylabel, fontsize=12)
+    plt.title(f'相对误差 (n={n})', fontsize=14)
+    plt.legend()
+    plt.grid(True, which="both", linestyle='--', linewidth=0.5)
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    x = np.random.randn(2, 1)
+    print(x)
+    n = int(input("请输入一个整数"))
+    errors, index = sweep(x, n)
+    for name, err in errors.items():
+        print(f"{name:>12s}: 最大相对误差 {err.max():.3e}")
+    plot_sweep(errors, index, n)
@@ -1,25 +1,202 @@
 import numpy as np
 
 
-def generate_special_matrix(n, alpha=None, beta=None):
+def generate_special_matrix(n, alpha=None, beta=None, dense=True):
+    """箭头矩阵：对角线 alpha，首行首列 beta[1:]（beta[0] 不用）。
+    dense=False 时返回只存 alpha, beta 的 ArrowheadMatrix。"""
     if alpha is None:
         alpha = np.random.rand(n) * 10
     if beta is None:
         beta = np.random.rand(n) * 10
+    if not dense:
+        return ArrowheadMatrix(alpha[:n], beta[:n])
 
-    A = np.zeros((n, n))
+    A = np.diag(np.asarray(alpha[:n], dtype=float))
+    A[0, 1:] = beta[1:n]  # 第一行 β₂ 到 βₙ
+    A[1:, 0] = beta[1:n]  # 第一列 β₂ 到 βₙ
+    return A
 
-    # 第一行
-    A[0, 0] = alpha[0]
-    for j in range(1, n):
-        A[0, j] = beta[j]  # β₂ 到 βₙ
 
-    # 第二行到第n行
-    for i in range(1, n):
-        A[i, 0] = beta[i]  # β₂ 到 βₙ
-        A[i, i] = alpha[i]  # α₂ 到 αₙ
+def _bcast(v, y):
+    """把长度为 m 的系数向量 v 变成可与 y (m,) 或 (m, k) 广播的形状"""
+    return v.reshape(v.shape + (1,) * (y.ndim - 1))
+
+
+def _suffix_sum(v):
+    """v 沿第 0 轴的后缀和（含自身）"""
+    return np.cumsum(v[::-1], axis=0)[::-1]
+
+
+class ArrowheadMatrix:
+    """箭头矩阵 A[0,0]=alpha[0], A[0,j]=A[j,0]=beta[j], A[i,i]=alpha[i]。
+    只存两个长度为 n 的向量，O(n) 内存。"""
+
+    def __init__(self, alpha, beta):
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+        if self.alpha.ndim != 1 or self.alpha.shape != self.beta.shape:
+            raise ValueError("alpha 与 beta 应为等长一维向量")
+        self.n = self.alpha.size
+
+    @property
+    def shape(self):
+        return (self.n, self.n)
+
+    def matvec(self, x):
+        x = np.asarray(x)
+        a, b = self.alpha, self.beta
+        y = _bcast(a, x) * x
+        y[0] += b[1:] @ x[1:]
+        y[1:] += np.multiply.outer(b[1:], x[0])
+        return y
+
+    def __matmul__(self, x):
+        return self.matvec(x)
+
+    def to_dense(self):
+        return generate_special_matrix(self.n, self.alpha, self.beta)
+
+    def qr(self):
+        return ArrowheadQR(self.alpha, self.beta)
+
+    def solve(self, y):
+        return self.qr().solve(y)
+
+
+class ArrowheadQR:
+    """箭头矩阵的 O(n) Givens QR：A[:, perm] = Q R，perm = [1, ..., n-1, 0]。
+
+    把首列换到最后，矩阵变成"向下的箭头" [[D, b], [b^T, a0]]，依次用第 k 行
+    的对角元消去最后一行第 k 个元素。设 π_k 为前 k 个旋转 c 的乘积，则
+    1/π_k² = 1 + Σ_{i<k} (b_i/α_i)²，最后一行末元素 h_k = π_k (a0 - Σ_{i<k} b_i²/α_i)，
+    全部旋转参数都能由前缀和一次算出，无需逐个循环。R 的结构为
+        R[k, k] = ρ_k,  R[k, j] = s_k π_k b_j (k < j < n-1),  R[k, n-1] = t_k,  R[n-1, n-1] = h,
+    即对角 + 秩一严格上三角 + 末列，Q 以 (c, s) 隐式保存。
+
+    若某个 α_k = 0 而 b_k ≠ 0（记第一个这样的位置为 k0），该步 c = 0，之后最后一行
+    只剩末元素，后续旋转都是恒等。前缀和形式相当于对箭头做不选主元的消元，
+    α 很小而 b 很大时可能比逐个旋转损失一些精度。
+    """
+
+    def __init__(self, alpha, beta):
+        alpha = np.asarray(alpha, dtype=float)
+        beta = np.asarray(beta, dtype=float)
+        self.n = n = alpha.size
+        self.m = m = n - 1
+        a, b = alpha[1:], beta[1:]
+        self.b = b
+
+        hit = np.flatnonzero((a == 0) & (b != 0))
+        self.k0 = k0 = int(hit[0]) if hit.size else m
+        ak, bk = a[:k0], b[:k0]
+        # k0 之前 α_k = 0 的列必有 b_k = 0，是全零列，不旋转
+        ratio = np.divide(bk, ak, out=np.zeros_like(bk), where=ak != 0)
+
+        pi = np.zeros(m + 1)
+        pi[0] = 1.0
+        pi[1:k0 + 1] = np.cumprod(np.where(ak < 0, -1.0, 1.0)) / np.sqrt(1 + np.cumsum(ratio ** 2))
+        h = pi[:k0 + 1] * (alpha[0] - np.concatenate(([0.0], np.cumsum(ratio * bk))))
+
+        w = pi[:k0] * bk
+        rho = a.copy()
+        c = np.ones(m)
+        s = np.zeros(m)
+        t = b.copy()
+        rho[:k0] = np.hypot(ak, w)
+        ok = rho[:k0] > 0
+        np.divide(ak, rho[:k0], out=c[:k0], where=ok)
+        np.divide(w, rho[:k0], out=s[:k0], where=ok)
+        t[:k0] = c[:k0] * bk + s[:k0] * h[:k0]
+        if k0 < m:
+            w0 = pi[k0] * b[k0]
+            rho[k0], c[k0], s[k0] = abs(w0), 0.0, np.sign(w0)
+            t[k0] = s[k0] * h[k0]
+            self.h = -s[k0] * b[k0]
+        else:
+            self.h = h[m]
+
+        self.K = min(k0 + 1, m)  # 前 K 个是真正的旋转，之后是恒等
+        self.pi, self.c, self.s, self.rho, self.t = pi, c, s, rho, t
+
+    @property
+    def perm(self):
+        return np.r_[1:self.n, 0]
+
+    def qtmul(self, y):
+        """Q^T y，y 按原始行序给出，结果按置换后的序（前 n-1 个对应 1..n-1，最后一个对应 0）"""
+        y = np.asarray(y, dtype=float)
+        yk, yL = y[1:], y[0]
+        K, k0, m = self.K, self.k0, self.m
+        pi, c, s = self.pi, self.c, self.s
+
+        # 最后一行的一阶递推 yL ← c_k yL - s_k y_k 展开为前缀和
+        g = s[:k0] / pi[1:k0 + 1]
+        acc = np.zeros((k0 + 1,) + yL.shape)
+        np.cumsum(_bcast(g, yk) * yk[:k0], axis=0, out=acc[1:])
+        yLk = _bcast(pi[:k0 + 1], acc) * (yL - acc)
+
+        out = np.empty_like(y)
+        out[:m] = yk
+        out[:K] = _bcast(c[:K], yk) * yk[:K] + _bcast(s[:K], yk) * yLk[:K]
+        out[m] = yLk[m] if k0 == m else -s[k0] * yk[k0]
+        return out
+
+    def qmul(self, z):
+        """Q z，z 按置换后的序，结果按原始行序"""
+        z = np.asarray(z, dtype=float)
+        zk, zL = z[:-1], z[-1]
+        K, pi, c, s = self.K, self.pi, self.c, self.s
+
+        # 逆序递推 zL ← c_k zL + s_k z_k 展开为后缀和
+        tail = pi[K] * zL
+        acc = _suffix_sum(_bcast(pi[:K] * s[:K], zk) * zk[:K]) + tail
+        zLk = np.empty((K + 1,) + zL.shape)
+        zLk[1:K] = acc[1:] / _bcast(pi[1:K], acc[1:])
+        zLk[K] = zL
+
+        out = np.empty_like(z)
+        out[1:] = zk
+        out[1:K + 1] = _bcast(c[:K], zk) * zk[:K] - _bcast(s[:K], zk) * zLk[1:]
+        out[0] = acc[0] if K else zL
+        return out
+
+    def rsolve(self, z):
+        """解 R x = z，z 与 x 都按置换后的序"""
+        z = np.asarray(z, dtype=float)
+        if self.h == 0 or np.any(self.rho == 0):
+            raise np.linalg.LinAlgError("箭头矩阵奇异")
+        K, k0, m = self.K, self.k0, self.m
+        pi, s, rho, b = self.pi, self.s, self.rho, self.b
+
+        x = np.empty_like(z)
+        x[m] = z[m] / self.h
+        q = z[:m] - np.multiply.outer(self.t, x[m])
+        x[K:m] = q[K:] / _bcast(rho[K:], q)
+
+        # σ_k = Σ_{j>k} b_j x_j 满足 σ_{k-1} = c_k² σ_k + b_k q_k / ρ_k，展开为后缀和
+        sigma = np.empty((K,) + q.shape[1:])
+        if K:
+            sigma[K - 1] = b[K:] @ x[K:m] if k0 < m else 0.0
+            e = _bcast(pi[:K] ** 2 * b[:K] / rho[:K], q) * q[:K]
+            sigma[:K - 1] = _suffix_sum(e[1:]) / _bcast(pi[1:K] ** 2, e[1:])
+        x[:K] = (q[:K] - _bcast(s[:K] * pi[:K], q) * sigma) / _bcast(rho[:K], q)
+        return x
+
+    def solve(self, y):
+        """解 A x = y，O(n) 时间和内存；y 可以是 (n,) 或 (n, k)"""
+        xp = self.rsolve(self.qtmul(y))
+        return np.concatenate((xp[-1:], xp[:-1]))
+
+    def dense_factors(self):
+        """显式构造 Q, R（仅用于小规模验证）"""
+        n, m = self.n, self.m
+        R = np.zeros((n, n))
+        R[:m, :m] = np.triu(np.outer(self.s * self.pi[:m], self.b), 1)
+        R[np.arange(m), np.arange(m)] = self.rho
+        R[:m, m] = self.t
+        R[m, m] = self.h
+        return self.qmul(np.eye(n)), R
 
-    return A
 
 def givens_rotation(a, b):
     if b == 0:
@@ -96,4 +273,20 @@ if __name__ == "__main__":
 
     # 验证 Q 正交性: Q^T Q ≈ I
     ortho_error = np.max(np.abs(Q.T @ Q - np.eye(n)))
-    print("Q 正交性误差 (||Q^T Q - I||_max):", ortho_error)
\ No newline at end of file
+    print("Q 正交性误差 (||Q^T Q - I||_max):", ortho_error)
+
+    # 结构化 QR：只存 alpha, beta，O(n) 时间和内存
+    F = ArrowheadMatrix(alpha, beta).qr()
+    Qs, Rs = F.dense_factors()
+    print("\n结构化 QR 的 R (列顺序 perm =", F.perm, "):")
+    print(Rs)
+    print("最大重建误差:", np.max(np.abs(A[:, F.perm] - Qs @ Rs)))
+
+    import time
+    for n in (10**5, 10**6, 10**7):
+        M = generate_special_matrix(n, dense=False)
+        y = np.random.rand(n)
+        t0 = time.perf_counter()
+        x = M.solve(y)
+        t1 = time.perf_counter() - t0
+        print(f"n={n:>8d}: 分解+求解 {t1:.3f}s, 残差 {np.max(np.abs(M @ x - y)):.2e}")
\ No newline at end of file
@@ -1,4 +1,7 @@
+import time
+
 import numpy as np
+from scipy.linalg import solve_triangular
 
 
 def gauss_elim_no_pivot(A, b):
@@ -57,9 +60,268 @@ def gauss_elim_pivot(A, b):
 
     return x
 
-def tridiag_linear_system(n,head,main_val,off_val,up_val):
+def _lu_panel(P, piv):
+    """对 m x b 面板做不分块的部分选主元 LU，每步对整个剩余子块做一次秩一更新（就地）。
+    piv[k] 为第 k 步交换到的面板内行号；主元恰为零时抛出 LinAlgError。"""
+    m, b = P.shape
+    for k in range(min(m, b)):
+        p = k + np.argmax(np.abs(P[k:, k]))
+        if P[p, k] == 0:
+            # 与 getrf 的 info > 0 相同，只有主元恰为零才算奇异，不设绝对阈值
+            raise np.linalg.LinAlgError("矩阵奇异，无唯一解")
+        piv[k] = p
+        if p != k:
+            P[[k, p]] = P[[p, k]]
+        P[k + 1:, k] /= P[k, k]
+        P[k + 1:, k + 1:] -= np.outer(P[k + 1:, k], P[k, k + 1:])
+
+
+def lu_factor(A, nb=64):
+    """分块右视部分选主元 LU：P A = L U。
+    返回 (LU, piv)：LU 中严格下三角为 L（单位对角不存），上三角为 U；
+    piv[k] 表示第 k 步与第 piv[k] 行交换（LAPACK getrf 约定）。
+    面板内用秩一更新，面板外用三角求解 + 一次矩阵乘法更新尾部子块。"""
+    LU = np.array(A, dtype=float)
+    n = LU.shape[0]
+    piv = np.arange(n)
+    for j0 in range(0, n, nb):
+        j1 = min(j0 + nb, n)
+        local = np.arange(j1 - j0)
+        _lu_panel(LU[j0:, j0:j1], local)
+        piv[j0:j1] = local + j0
+        # 面板内的行交换补到左右两侧
+        for k in range(j0, j1):
+            p = piv[k]
+            if p != k:
+                LU[[k, p], :j0] = LU[[p, k], :j0]
+                LU[[k, p], j1:] = LU[[p, k], j1:]
+        if j1 < n:
+            LU[j0:j1, j1:] = solve_triangular(LU[j0:j1, j0:j1], LU[j0:j1, j1:], lower=True, unit_diagonal=True)
+            LU[j1:, j1:] -= LU[j1:, j0:j1] @ LU[j0:j1, j1:]
+    return LU, piv
+
+
+def lu_solve(lu_piv, b):
+    """用 lu_factor 的结果解 A x = b，b 可以是 (n,) 或 (n, k)"""
+    LU, piv = lu_piv
+    perm = np.arange(len(piv))
+    for k, p in enumerate(piv):
+        perm[k], perm[p] = perm[p], perm[k]
+    y = solve_triangular(LU, np.asarray(b, dtype=float)[perm], lower=True, unit_diagonal=True)
+    return solve_triangular(LU, y)
+
+
+def bench_lu(ns=(200, 500, 1000, 2000, 4000), nrhs=8, old_max=1000, seed=0):
+    """lu_factor + lu_solve 与 gauss_elim_pivot 的耗时对比；gauss_elim_pivot 是 O(n^2) 次
+    Python 级行更新，n > old_max 时跳过"""
+    rng = np.random.default_rng(seed)
+    for n in ns:
+        A = rng.standard_normal((n, n))
+        B = rng.standard_normal((n, nrhs))
+        t0 = time.perf_counter()
+        F = lu_factor(A)
+        t1 = time.perf_counter()
+        X = lu_solve(F, B)
+        t2 = time.perf_counter()
+        res = np.max(np.abs(A @ X - B)) / (np.max(np.abs(A)) * np.max(np.abs(X)))
+        line = f"n={n:5d}: lu_factor {t1 - t0:7.3f}s, lu_solve({nrhs} 个右端) {t2 - t1:7.4f}s, 相对残差 {res:.1e}"
+        if n <= old_max:
+            t0 = time.perf_counter()
+            x = gauss_elim_pivot(A, B[:, 0])
+            t1 = time.perf_counter()
+            line += f", gauss_elim_pivot(1 个右端) {t1 - t0:7.3f}s, 差 {np.max(np.abs(x - X[:, 0])):.1e}"
+        print(line)
+
+
+def thomas(lower, diag, upper, rhs):
+    """Thomas 算法解三对角方程组（不选主元，适用于对角占优等情形）。
+    lower, upper: (..., n-1)，diag: (..., n)，rhs: (..., n)；前导维是批量维，
+    逐行递推，每一步对整批方程组做向量化运算。"""
+    diag = np.asarray(diag, dtype=float)
+    batch = np.broadcast_shapes(np.shape(lower)[:-1], diag.shape[:-1],
+                                np.shape(upper)[:-1], np.shape(rhs)[:-1])
+    n = diag.shape[-1]
+    # 把行号放到第 0 维，每一步取到的是连续的一整批
+    a, b, c, d = (np.ascontiguousarray(np.moveaxis(np.broadcast_to(v, batch + np.shape(v)[-1:]), -1, 0), dtype=float)
+                  for v in (lower, diag, upper, rhs))
+
+    cp = np.empty_like(b)
+    x = np.empty_like(b)
+    cp[0] = c[0] / b[0] if n > 1 else 0.0
+    x[0] = d[0] / b[0]
+    for i in range(1, n):
+        m = b[i] - a[i - 1] * cp[i - 1]
+        if i < n - 1:
+            cp[i] = c[i] / m
+        x[i] = (d[i] - a[i - 1] * x[i - 1]) / m
+    for i in range(n - 2, -1, -1):
+        x[i] -= cp[i] * x[i + 1]
+    return np.moveaxis(x, 0, -1)
+
+
+class BandedMatrix:
+    """LAPACK 带状存储 ab[..., ku + i - j, j] = A[i, j]，前导维为批量维。"""
+
+    def __init__(self, ab, kl, ku):
+        self.ab = np.asarray(ab, dtype=float)
+        self.kl, self.ku = kl, ku
+        if self.ab.ndim < 2 or self.ab.shape[-2] != kl + ku + 1:
+            raise ValueError("ab 的倒数第二维应为 kl + ku + 1")
+        self.n = self.ab.shape[-1]
+        self.batch = self.ab.shape[:-2]
+
+    @classmethod
+    def from_diagonals(cls, lower, diag, upper):
+        """由三条对角线构造（可带批量维）"""
+        diag = np.asarray(diag, dtype=float)
+        batch = np.broadcast_shapes(np.shape(lower)[:-1], diag.shape[:-1], np.shape(upper)[:-1])
+        n = diag.shape[-1]
+        ab = np.zeros(batch + (3, n))
+        ab[..., 0, 1:] = upper
+        ab[..., 1, :] = diag
+        ab[..., 2, :-1] = lower
+        return cls(ab, 1, 1)
+
+    @classmethod
+    def from_dense(cls, A, kl, ku):
+        A = np.asarray(A, dtype=float)
+        n = A.shape[-1]
+        ab = np.zeros(A.shape[:-2] + (kl + ku + 1, n))
+        for d in range(-kl, ku + 1):
+            j = np.arange(max(d, 0), min(n, n + d))
+            ab[..., ku - d, j] = A[..., j - d, j]
+        return cls(ab, kl, ku)
+
+    @property
+    def shape(self):
+        return self.batch + (self.n, self.n)
+
+    def to_dense(self):
+        n, ku = self.n, self.ku
+        A = np.zeros(self.shape)
+        for d in range(-self.kl, ku + 1):
+            j = np.arange(max(d, 0), min(n, n + d))
+            A[..., j - d, j] = self.ab[..., ku - d, j]
+        return A
+
+    def row_band(self):
+        """按行存储的带：R[..., i, k] = A[i, i - kl + k]，k = 0..kl+ku"""
+        n, kl, ku = self.n, self.kl, self.ku
+        R = np.zeros(self.batch + (n, kl + ku + 1))
+        for k in range(kl + ku + 1):
+            d = k - kl  # 列号 - 行号
+            i = np.arange(max(-d, 0), min(n, n - d))
+            R[..., i, k] = self.ab[..., ku - d, i + d]
+        return R
+
+    def matvec(self, x):
+        """y = A x，x: (..., n)"""
+        n, ku = self.n, self.ku
+        x = np.asarray(x)
+        y = np.zeros(np.broadcast_shapes(self.batch, x.shape[:-1]) + (n,))
+        for d in range(-self.kl, ku + 1):
+            lo, hi = max(d, 0), min(n, n + d)
+            y[..., lo - d:hi - d] += self.ab[..., ku - d, lo:hi] * x[..., lo:hi]
+        return y
+
+    def __matmul__(self, x):
+        return self.matvec(x)
+
+    def lu(self):
+        return BandedLU(self)
+
+    def solve(self, rhs, method="lu"):
+        """method='thomas' 只适用于 kl = ku = 1 且无需选主元的情形"""
+        if method == "thomas":
+            if self.kl != 1 or self.ku != 1:
+                raise ValueError("Thomas 算法只适用于三对角矩阵")
+            ab = self.ab
+            return thomas(ab[..., 2, :-1], ab[..., 1, :], ab[..., 0, 1:], rhs)
+        return self.lu().solve(rhs)
+
+
+class BandedLU:
+    """带状矩阵的部分选主元 LU（gbtrf 的做法），对整批矩阵同时消元。
+
+    第 k 步只涉及行 k..k+kl、列 k..k+kl+ku，用一个 (kl+1) x (kl+ku+1) 的稠密窗口
+    保存这块：选主元、交换、秩一更新都在窗口内完成，然后窗口向右下滑一格，
+    补进尚未被触及的第 k+kl+1 行。选主元后 U 的带宽为 kl+ku。
+    """
+
+    def __init__(self, A):
+        n, kl, ku = A.n, A.kl, A.ku
+        self.n, self.kl, self.ku, self.batch = n, kl, ku, A.batch
+        w = kl + ku + 1
+        # 批量维展平到第 1 维，步号在第 0 维；补 kl+1 行零便于处理尾部
+        R = np.zeros((n + kl + 1, int(np.prod(A.batch, dtype=int)), w))
+        R[:n] = np.moveaxis(A.row_band().reshape(-1, n, w), 1, 0)
+        B = R.shape[1]
+        idx = np.arange(B)
+
+        win = np.zeros((B, kl + 1, w))
+        for r in range(min(kl + 1, n)):
+            win[:, r, :w - kl + r] = R[r, :, kl - r:]
+
+        self.U = np.empty((n, B, w))
+        self.L = np.empty((n, B, kl))
+        self.piv = np.empty((n, B), dtype=np.intp)
+        for k in range(n):
+            p = np.argmax(np.abs(win[:, :, 0]), axis=1)
+            self.piv[k] = k + p
+            top = win[idx, p].copy()
+            win[idx, p] = win[:, 0]
+            win[:, 0] = top
+            piv = top[:, :1]
+            l = np.divide(win[:, 1:, 0], piv, out=np.zeros((B, kl)), where=piv != 0)
+            win[:, 1:, 1:] -= l[:, :, None] * top[:, None, 1:]
+            self.U[k] = top
+            self.L[k] = l
+            win[:, :-1, :-1] = win[:, 1:, 1:]
+            win[:, :-1, -1] = 0.0
+            win[:, -1] = R[k + kl + 1]
+
+    def singular(self):
+        """每个批量元素是否出现零主元"""
+        return np.any(self.U[:, :, 0] == 0, axis=0).reshape(self.batch)
+
+    def solve(self, rhs):
+        """rhs: batch + (n,) 或 batch + (n, nrhs)"""
+        n, kl = self.n, self.kl
+        rhs = np.asarray(rhs, dtype=float)
+        nb = len(self.batch)
+        extra = rhs.shape[nb + 1:]
+        if np.any(self.singular()):
+            raise np.linalg.LinAlgError("带状矩阵奇异")
+
+        B = self.U.shape[1]
+        x = np.zeros((n + kl + self.ku + 1, B) + extra)
+        x[:n] = np.moveaxis(np.broadcast_to(rhs, self.batch + rhs.shape[nb:]).reshape((B, n) + extra), 1, 0)
+        idx = np.arange(B)
+        ex = (slice(None),) + (None,) * len(extra)
+
+        # 前代：交换和消元交替进行
+        for k in range(n):
+            p = self.piv[k]
+            top = x[p, idx].copy()
+            x[p, idx] = x[k]
+            x[k] = top
+            x[k + 1:k + kl + 1] -= np.moveaxis(self.L[k], 1, 0)[(slice(None),) + ex] * top
+        # 回代
+        w = self.U.shape[2]
+        for k in range(n - 1, -1, -1):
+            U = self.U[k]
+            acc = x[k] - np.einsum('bj,jb...->b...', U[:, 1:], x[k + 1:k + w])
+            x[k] = acc / U[:, 0][ex]
+        return np.moveaxis(x[:n], 0, 1).reshape(self.batch + (n,) + extra)
+
+
+def tridiag_linear_system(n,head,main_val,off_val,up_val,banded=False):
     b=np.full(n,15)
     b[0],b[-1]=head,14
+    if banded:
+        # 只存三条对角线，O(n) 内存
+        A=BandedMatrix.from_diagonals(np.full(n-1,off_val),np.full(n,main_val),np.full(n-1,up_val))
+        return A,b
     print(b)
     A=np.diag(np.full(n,main_val))+np.diag(np.full(n-1,up_val),1)+np.diag(np.full(n-1,off_val),-1)
     print(A)
@@ -70,3 +332,26 @@ if __name__ == "__main__":
     x1=gauss_elim_no_pivot(A,b)
     x2=gauss_elim_pivot(A,b)
     print(x1,x2)
+
+    Ab,_=tridiag_linear_system(100,7,6,8,1,banded=True)
+    x3=Ab.solve(b,method="thomas")
+    x4=Ab.solve(b)
+    # 该矩阵不是对角占优（|8| > |6|），不选主元的 Thomas 与 gauss_elim_no_pivot 一样失稳
+    for name,x in (("no_pivot",x1),("pivot",x2),("thomas",x3),("banded lu",x4)):
+        print(f"{name}: max|x| = {np.max(np.abs(x)):.3e}, 残差 {np.max(np.abs(A@x-b)):.2e}")
+
+    # 批量：一次解 10^5 个独立的 100 阶三对角方程组
+    rng=np.random.default_rng(0)
+    batch,n=10**5,100
+    lower,upper=rng.standard_normal((batch,n-1)),rng.standard_normal((batch,n-1))
+    diag=4+rng.random((batch,n))
+    rhs=rng.standard_normal((batch,n))
+    Ab=BandedMatrix.from_diagonals(lower,diag,upper)
+    for method in ("thomas","lu"):
+        t0=time.perf_counter()
+        x=Ab.solve(rhs,method=method)
+        t1=time.perf_counter()-t0
+        print(f"{method}: {batch} 个方程组 {t1:.3f}s, 最大残差 {np.max(np.abs(Ab@x-rhs)):.2e}")
+
+    # 稠密分块 LU 与逐行消元的对比
+    bench_lu()
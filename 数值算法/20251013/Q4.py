@@ -1,7 +1,28 @@
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
 import numpy as np
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 
+#CGS 的每一遍投影都只用到 A[:,i]，可以写成一次矩阵-向量乘 Q^H a
 def CGS(A):
+    m,n=A.shape
+    Q=np.zeros((m,n), dtype=A.dtype, order='F')  # 按列存储，Q[:,:i] 是连续内存
+    R=np.zeros((n,n), dtype=A.dtype)
+    for i in range(n):
+        R[:i,i]=Q[:,:i].conj().T@A[:,i]
+        Q[:,i]=A[:,i]-Q[:,:i]@R[:i,i]
+        R[i,i]=np.linalg.norm(Q[:,i])
+        Q[:,i]/=R[i,i]
+    return Q,R
+
+#逐列 vdot/axpy 的原始写法，只用作计时和结果对照
+def CGS_loop(A):
     m,n=A.shape
     Q=np.zeros((m,n), dtype=A.dtype)
     R=np.zeros((n,n), dtype=A.dtype)
@@ -27,7 +48,22 @@ def MGS(A):
         Q[:,i]/=R[i,i]
     return Q,R
 
+#两遍 CGS，每遍一次矩阵-向量乘
 def CGS2(A):
+    m,n=A.shape
+    Q=np.zeros((m,n), dtype=A.dtype, order='F')  # 按列存储，Q[:,:i] 是连续内存
+    R=np.zeros((n,n), dtype=A.dtype)
+    for i in range(n):
+        R[:i,i]=Q[:,:i].conj().T@A[:,i]
+        Q[:,i]=A[:,i]-Q[:,:i]@R[:i,i]
+        r=Q[:,:i].conj().T@Q[:,i]
+        R[:i,i]+=r
+        Q[:,i]-=Q[:,:i]@r
+        R[i,i]=np.linalg.norm(Q[:,i])
+        Q[:,i]/=R[i,i]
+    return Q,R
+
+def CGS2_loop(A):
     m,n=A.shape
     Q=np.zeros((m,n), dtype=A.dtype)
     R=np.zeros((n,n), dtype=A.dtype)
@@ -61,79 +97,190 @@ def MGS2(A):
         Q[:,i]/=R[i,i]
     return Q,R
 
+#分块 MGS2：每次处理 b 列的面板。面板先对之前已正交化的列做两遍块投影
+#(矩阵-矩阵乘，BLAS-3)，面板内部再逐列做两遍 MGS
+def MGS2_blocked(A, b=32):
+    m,n=A.shape
+    Q=np.zeros((m,n), dtype=A.dtype, order='F')  # 按列存储，Q[:,:i] 是连续内存
+    R=np.zeros((n,n), dtype=A.dtype)
+    for k0 in range(0,n,b):
+        k1=min(n,k0+b)
+        P=np.array(A[:,k0:k1], order='F')  # 必须复制：A 本身按列存储时 asfortranarray 返回视图，会改写输入
+        if k0>0:
+            Qp=Q[:,:k0]
+            S=Qp.conj().T@P
+            P-=Qp@S
+            S2=Qp.conj().T@P
+            P-=Qp@S2
+            R[:k0,k0:k1]=S+S2
+        for i in range(k1-k0):
+            for _ in range(2):
+                for j in range(i):
+                    r=np.vdot(P[:,j],P[:,i])
+                    R[k0+j,k0+i]+=r
+                    P[:,i]-=r*P[:,j]
+            R[k0+i,k0+i]=np.linalg.norm(P[:,i])
+            P[:,i]/=R[k0+i,k0+i]
+        Q[:,k0:k1]=P
+    return Q,R
 
-def visualize_qr_methods(A, methods, titles):
-    n = A.shape[1]
-    num_methods = len(methods)
-
-    # 存储结果
-    ortho_losses = []
-    residuals = []
-    Qs, Rs = [], []
-
-    for method in methods:
-        Q, R = method(A)
-        Qs.append(Q)
-        Rs.append(R)
-        ortho_loss = np.abs(Q.conj().T @ Q - np.eye(n))
-        residual = np.linalg.norm(A - Q @ R, ord='fro')
-        ortho_losses.append(ortho_loss)
-        residuals.append(residual)
-
-    # ===== 图1: 正交性损失热图 =====
-    fig1, axes1 = plt.subplots(1, num_methods, figsize=(5 * num_methods, 4))
-    if num_methods == 1:
-        axes1 = [axes1]
-
-
-    #越深数值越小，越浅数值越大，更黑的图显示更低的Q*Q-I
-    for idx in range(num_methods):
-        im = axes1[idx].imshow(ortho_losses[idx], cmap='hot', vmin=0)
-        axes1[idx].set_title(f'{titles[idx]}\nOrthogonality Loss', fontsize=12)
-        axes1[idx].set_xlabel('j')
-        axes1[idx].set_ylabel('i')
-        plt.colorbar(im, ax=axes1[idx], shrink=0.8)
-        max_val = ortho_losses[idx].max()
-        axes1[idx].text(0.05, 0.95, f'max={max_val:.1e}',
-                        transform=axes1[idx].transAxes,
-                        color='white', fontsize=10,
-                        bbox=dict(facecolor='black', alpha=0.6))
 
-    plt.tight_layout()
-    plt.show()
-
-    # ===== 图2: 残差 ||A - QR||_F 柱状图 =====
-    fig2, ax2 = plt.subplots(figsize=(8, 5))
-    bars = ax2.bar(titles, residuals, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728'][:num_methods])
-    ax2.set_yscale('log')
-    ax2.set_ylabel(r'$\|A - QR\|_F$ (Frobenius norm)', fontsize=12)
-    ax2.set_title('Reconstruction Residuals of QR Decompositions', fontsize=14)
-    ax2.grid(True, which="both", ls="--", linewidth=0.5)
-
-    y_min, y_max = min(residuals) * 0.9, max(residuals) * 1.05  # 下限缩小10%，上限扩大1倍
-    ax2.set_ylim(bottom=y_min, top=y_max)
-
-    # 在柱子上标注数值
-    for bar, res in zip(bars, residuals):
-        height = bar.get_height()
-        y_pos = height *1.02
-        ax2.text(bar.get_x() + bar.get_width() / 2.,y_pos,
-                 f'{res:.1e}', ha='center', va='bottom', fontsize=10)
+def time_qr_methods(shapes, pairs, seed=0, loop_max_cols=300):
+    """
+    对每个形状 (m, n)，比较原始逐列实现与新内核的耗时，以及两者 Q、R 的最大差和正交性。
+    pairs: [(名字, 旧实现, 新实现), ...]；n 超过 loop_max_cols 时跳过旧实现（太慢）。
+    """
+    rng=np.random.default_rng(seed)
+    for m,n in shapes:
+        A=rng.standard_normal((m,n))
+        for name,old,new in pairs:
+            t0=time.perf_counter()
+            Q,R=new(A)
+            t_new=time.perf_counter()-t0
+            ortho=np.linalg.norm(Q.conj().T@Q-np.eye(n))
+            line=f"{m:>7}x{n:<5} {name:>5}: new {t_new:8.3f}s, ||Q^HQ-I||_F={ortho:.1e}"
+            if n<=loop_max_cols:
+                t0=time.perf_counter()
+                Q0,R0=old(A)
+                t_old=time.perf_counter()-t0
+                diff=max(np.abs(Q-Q0).max(),np.abs(R-R0).max()/np.abs(R0).max())
+                line+=f", old {t_old:8.3f}s, speedup {t_old/t_new:6.1f}, max diff {diff:.1e}"
+            print(line)
+
+
+# ===== 无界面、批量的 QR 质量基准 =====
+METHODS = {'CGS': CGS, 'MGS': MGS, 'CGS2': CGS2, 'MGS2': MGS2, 'MGS2_blocked': MGS2_blocked}
+
+
+def make_test_matrix(m, n, cond, dtype, seed=0):
+    # A = U diag(s) V^H，奇异值在 [1/cond, 1] 上按对数均匀分布
+    rng = np.random.default_rng(seed)
+    dtype = np.dtype(dtype)
+
+    def rand(*shape):
+        X = rng.standard_normal(shape)
+        if dtype.kind == 'c':
+            X = X + 1j * rng.standard_normal(shape)
+        return X
+
+    U, _ = np.linalg.qr(rand(m, n))
+    V, _ = np.linalg.qr(rand(n, n))
+    s = np.logspace(0, -np.log10(cond), n)
+    return ((U * s) @ V.conj().T).astype(dtype)
+
+
+def qr_quality(A, Q, R, block=256):
+    """
+    按列块计算 max|Q^H Q - I|、||Q^H Q - I||_F 和 ||A - QR||_F / ||A||_F，
+    不形成 n x n 的 Q^H Q。
+    """
+    n = Q.shape[1]
+    ortho_max, ortho_fro2, res2 = 0.0, 0.0, 0.0
+    for j0 in range(0, n, block):
+        j1 = min(n, j0 + block)
+        G = Q.conj().T @ Q[:, j0:j1]
+        G[np.arange(j0, j1), np.arange(j1 - j0)] -= 1
+        ortho_max = max(ortho_max, float(np.abs(G).max()))
+        ortho_fro2 += float(np.sum(np.abs(G) ** 2))
+        res2 += float(np.sum(np.abs(A[:, j0:j1] - Q @ R[:, j0:j1]) ** 2))
+    return ortho_max, ortho_fro2 ** 0.5, res2 ** 0.5 / float(np.linalg.norm(A))
+
+
+def run_case(case):
+    """
+    子进程里跑一个 (m, n, cond, dtype, method) 组合：先计时，再在 tracemalloc 下重跑一次测峰值内存。
+    """
+    A = make_test_matrix(case['m'], case['n'], case['cond'], case['dtype'], case['seed'])
+    method = METHODS[case['method']]
+    t0 = time.perf_counter()
+    Q, R = method(A)
+    wall = time.perf_counter() - t0
+    ortho_max, ortho_fro, residual = qr_quality(A, Q, R)
+    peak = None
+    if case['measure_memory']:
+        del Q, R
+        tracemalloc.start()
+        method(A)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return dict(case, wall_time=wall, peak_bytes=peak, ortho_loss_max=ortho_max,
+                ortho_loss_fro=ortho_fro, residual=residual)
+
+
+def run_benchmark(ms=(1000,), ns=(50, 100), conds=(1e2, 1e6, 1e10), dtypes=('float64', 'complex128'),
+                  methods=tuple(METHODS), workers=None, seed=0, measure_memory=True,
+                  out_json='qr_bench.json', out_csv='qr_bench.csv'):
+    """
+    扫描 (m, n, 条件数, dtype, 方法) 的所有组合，在进程池里并行运行，
+    结果写成 JSON 和 CSV（有一个为 None 就不写），并返回记录列表。
+    """
+    cases = [dict(m=m, n=n, cond=c, dtype=d, method=meth, seed=seed, measure_memory=measure_memory)
+             for m, n, c, d, meth in itertools.product(ms, ns, conds, dtypes, methods) if m >= n]
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(pool.map(run_case, cases))
+    if out_json:
+        with open(out_json, 'w') as f:
+            json.dump(results, f, indent=1)
+    if out_csv:
+        with open(out_csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    return results
+
 
+def plot_results(path='qr_bench.json', save_dir=None, show=False):
+    """
+    只根据存下来的结果画图：正交性损失随条件数的变化、耗时随 n 的变化（每种 dtype 一组）。
+    save_dir 给出时保存为 png；show=True 时才弹窗。
+    """
+    with open(path) as f:
+        results = json.load(f)
+    dtypes = sorted({r['dtype'] for r in results})
+    methods = [m for m in METHODS if any(r['method'] == m for r in results)]
+    m_max, n_max = max(r['m'] for r in results), max(r['n'] for r in results)
+    fig, axes = plt.subplots(2, len(dtypes), figsize=(6 * len(dtypes), 9), squeeze=False)
+    for col, dtype in enumerate(dtypes):
+        for meth in methods:
+            rows = sorted((r for r in results if r['dtype'] == dtype and r['method'] == meth
+                           and r['m'] == m_max and r['n'] == n_max), key=lambda r: r['cond'])
+            axes[0, col].loglog([r['cond'] for r in rows], [r['ortho_loss_max'] for r in rows], 'o-', label=meth)
+            cmax = max(r['cond'] for r in results)
+            rows = sorted((r for r in results if r['dtype'] == dtype and r['method'] == meth
+                           and r['m'] == m_max and r['cond'] == cmax), key=lambda r: r['n'])
+            axes[1, col].loglog([r['n'] for r in rows], [r['wall_time'] for r in rows], 'o-', label=meth)
+        axes[0, col].set_title(f'{dtype}, {m_max}x{n_max}')
+        axes[0, col].set_xlabel('cond(A)')
+        axes[0, col].set_ylabel(r'max $|Q^HQ-I|$')
+        axes[1, col].set_xlabel('n')
+        axes[1, col].set_ylabel('wall time (s)')
+        for ax in axes[:, col]:
+            ax.grid(True, which="both", ls="--", linewidth=0.5)
+            ax.legend()
     plt.tight_layout()
-    plt.show()
+    if save_dir:
+        fig.savefig(os.path.join(save_dir, 'qr_bench.png'), dpi=120)
+    if show:
+        plt.show()
+    plt.close(fig)
 
 
 if __name__ == "__main__":
-    # 生成复矩阵 (m >= n)
-    m, n = 100, 20
-    for i in range(5):
-        np.random.seed(i)
-        A = np.random.randn(m, n) + 1j * np.random.randn(m, n)
-
-        # 定义要比较的方法
-        methods = [CGS, MGS, CGS2, MGS2]
-        titles = ['CGS', 'MGS', 'CGS+Reorth', 'MGS+Reorth']
-
-        # 可视化
-        visualize_qr_methods(A, methods, titles)
+    # python Q4.py          只跑基准并写 qr_bench.json / qr_bench.csv
+    # python Q4.py --plot   再根据结果文件画图
+    # 各方法都不能改写输入矩阵（按行、按列存储都检查）
+    for order in ('C', 'F'):
+        A = np.array(np.random.default_rng(1).standard_normal((200, 70)), order=order)
+        A0 = A.copy()
+        for name, method in METHODS.items():
+            method(A)
+            assert np.array_equal(A, A0), f"{name} 改写了 {order} 序的输入"
+    time_qr_methods([(1000,100),(10000,300),(100000,1000)],
+                    [('CGS',CGS_loop,CGS),('CGS2',CGS2_loop,CGS2),('MGS2',MGS2,MGS2_blocked)])
+    results = run_benchmark(ms=(1000, 10000), ns=(20, 100, 300))
+    for r in results:
+        print(f"{r['m']:>6}x{r['n']:<4} cond={r['cond']:.0e} {r['dtype']:>10} {r['method']:>12}: "
+              f"{r['wall_time']:.3f}s, peak {r['peak_bytes'] / 2**20:.1f} MiB, "
+              f"ortho {r['ortho_loss_max']:.1e}, residual {r['residual']:.1e}")
+    if '--plot' in sys.argv:
+        plot_results(save_dir='.', show=True)
@@ -1,6 +1,11 @@
+import os
+import time
 import numpy as np
 import math
 import matplotlib.pyplot as plt
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from scipy.linalg import solve_triangular
 
 def MGS2(A):
     m,n=A.shape
@@ -24,6 +29,214 @@ def best_line(A,b):
     Qb=Q.T@b
     return np.linalg.solve(R,Qb)
 
+# ===== TSQR：按行分块的 QR，只保留 R =====
+# 行块可以是数组，也可以是 RowBlock（memmap 文件中的一段行，由子进程自己去读，避免传数据）；
+# 最小二乘时每个块是 (A_i, b_i)，在块内拼成 [A_i | b_i]，R 的最后一列就是 Q^T b。
+RowBlock = namedtuple('RowBlock', ['path', 'dtype', 'shape', 'start', 'stop'])
+
+
+def memmap_row_blocks(path, shape, dtype=np.float64, rows_per_block=1 << 16):
+    for start in range(0, shape[0], rows_per_block):
+        yield RowBlock(path, np.dtype(dtype).str, tuple(shape), start, min(shape[0], start + rows_per_block))
+
+
+def array_row_blocks(A, rows_per_block=1 << 16):
+    for start in range(0, A.shape[0], rows_per_block):
+        yield A[start:start + rows_per_block]
+
+
+def read_block(block):
+    if isinstance(block, RowBlock):
+        X = np.memmap(block.path, dtype=block.dtype, mode='r', shape=block.shape)
+        return np.array(X[block.start:block.stop])
+    if isinstance(block, tuple):
+        return np.column_stack([read_block(b) for b in block])
+    return np.asarray(block)
+
+
+def local_r(block):
+    return np.linalg.qr(read_block(block), mode='r')
+
+
+def merge_r(R1, R2):
+    return np.linalg.qr(np.vstack([R1, R2]), mode='r')
+
+
+def tsqr(blocks, workers=None):
+    """
+    通信避免的 TSQR：各行块在进程池里独立做 QR，得到的小 R 按二叉归约树两两合并。
+    blocks 可以是生成器；同时在途的块不超过 2*workers 个，内存只和块大小有关。
+    返回 R（不形成 Q）。
+    """
+    workers = workers or os.cpu_count() or 1
+    stack = []  # (层数, R)，像二进制计数器一样合并同层的两个 R
+
+    def push(R):
+        level = 0
+        while stack and stack[-1][0] == level:
+            R = merge_r(stack.pop()[1], R)
+            level += 1
+        stack.append((level, R))
+
+    if workers == 1:
+        for block in blocks:
+            push(local_r(block))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            for block in blocks:
+                pending.append(pool.submit(local_r, block))
+                if len(pending) >= 2 * workers:
+                    push(pending.popleft().result())
+            while pending:
+                push(pending.popleft().result())
+    R = stack.pop()[1]
+    while stack:
+        R = merge_r(stack.pop()[1], R)
+    return R
+
+
+def tsqr_lstsq(blocks, workers=None):
+    """
+    一遍扫描数据的最小二乘：blocks 产生 (A_i, b_i)。
+    返回 x 和残差范数 ||Ax - b||。
+    """
+    R = tsqr(blocks, workers)
+    n = R.shape[1] - 1
+    x = solve_triangular(R[:n, :n], R[:n, n])
+    res = abs(R[n, n]) if R.shape[0] > n else 0.0
+    return x, res
+
+
+def best_line_tsqr(A_blocks, b_blocks, workers=None):
+    x, _ = tsqr_lstsq(zip(A_blocks, b_blocks), workers)
+    return x
+
+
+# ===== 在线最小二乘：对增广矩阵 [A | b] 的 R 做 Givens 增行与删行 =====
+class OnlineLSQ:
+    """
+    保存增广三角阵 R_aug ((n+1) x (n+1))：左上 n x n 是 R，最后一列前 n 个是 Q^T b，
+    右下角是残差范数。增加一行用 Givens 旋转，删除一行用 LINPACK dchdd 式的 Givens 下降，
+    每行都是 O(n^2)，不保存 Q。
+    为了能重新分解，窗口内的行另外存一份；删行失败（数值上不再正定）或
+    每 refactor_every 次删行后，直接对窗口里的数据重新做 QR，防止误差累积。
+    keep_rows 默认只在有窗口时保存数据行；不设窗口的连续数据流内存只有 O(n^2)，
+    此时要手动 remove_oldest 需显式传 keep_rows=True。
+    """
+    def __init__(self, n, window=None, refactor_every=10000, keep_rows=None):
+        self.n = n
+        self.window = window
+        self.refactor_every = refactor_every
+        self.keep_rows = window is not None if keep_rows is None else keep_rows
+        if window is not None and not self.keep_rows:
+            raise ValueError("滑动窗口需要保存窗口内的数据行（keep_rows=True）")
+        self.R = np.zeros((n + 1, n + 1))
+        self.rows = deque()
+        self.count = 0
+        self.downdates = 0
+        self.refactors = 0
+
+    def _update(self, z):
+        R = self.R
+        z = z.copy()
+        for k in range(self.n + 1):
+            if z[k] == 0:
+                continue
+            r = math.hypot(R[k, k], z[k])
+            c, s = R[k, k] / r, z[k] / r
+            Rk = R[k, k:].copy()
+            R[k, k:] = c * Rk + s * z[k:]
+            z[k:] = -s * Rk + c * z[k:]
+
+    def _downdate(self, z):
+        # 解 R^T p = z，alpha^2 = 1 - ||p||^2 <= 0 时说明删掉这一行后不再满秩
+        R = self.R
+        with np.errstate(all='ignore'):
+            p = solve_triangular(R, z, trans='T', check_finite=False)
+        alpha2 = 1.0 - p @ p
+        if not np.isfinite(alpha2) or alpha2 <= 1e-12:
+            return False
+        alpha = math.sqrt(alpha2)
+        m = self.n + 1
+        c = np.empty(m)
+        s = np.empty(m)
+        for i in range(m - 1, -1, -1):
+            r = math.hypot(alpha, p[i])
+            c[i], s[i] = alpha / r, p[i] / r
+            alpha = r
+        xx = np.zeros(m)
+        for i in range(m - 1, -1, -1):
+            t = c[i] * xx[i:] + s[i] * R[i, i:]
+            R[i, i:] = c[i] * R[i, i:] - s[i] * xx[i:]
+            xx[i:] = t
+        return True
+
+    def refactor(self):
+        self.R = np.zeros((self.n + 1, self.n + 1))
+        if self.rows:
+            Rw = np.linalg.qr(np.array(self.rows), mode='r')
+            self.R[:Rw.shape[0]] = Rw
+        self.downdates = 0
+        self.refactors += 1
+
+    def add(self, a, y):
+        z = np.append(np.asarray(a, dtype=float), y)
+        if self.keep_rows:
+            self.rows.append(z)
+        self._update(z)
+        self.count += 1
+        if self.window is not None and len(self.rows) > self.window:
+            self.remove_oldest()
+
+    def remove_oldest(self):
+        if not self.keep_rows:
+            raise ValueError("未保存数据行（keep_rows=False），无法删除最早的行")
+        if not self.rows:
+            raise ValueError("没有可删除的行")
+        z = self.rows.popleft()
+        self.count -= 1
+        self.downdates += 1
+        if self.downdates >= self.refactor_every or not self._downdate(z):
+            self.refactor()
+
+    def solve(self):
+        n = self.n
+        return solve_triangular(self.R[:n, :n], self.R[:n, n])
+
+    @property
+    def residual_norm(self):
+        return abs(self.R[self.n, self.n])
+
+
+def bench_online(m=200_000, window=10_000, seed=0):
+    """
+    数据流：逐点到达，窗口外的点过期。报告每秒处理的行数，并与窗口上的批量 lstsq 比较。
+    """
+    rng = np.random.default_rng(seed)
+    t = rng.uniform(3, 10, m)
+    y = np.log(t) + 0.01 * rng.standard_normal(m)
+    # 不设窗口时只保存 R，不保存数据行；空的拟合器删行给出 ValueError
+    fit = OnlineLSQ(2)
+    for i in range(1000):
+        fit.add((1.0, t[i]), y[i])
+    assert len(fit.rows) == 0 and fit.count == 1000
+    try:
+        OnlineLSQ(2, keep_rows=True).remove_oldest()
+        raise AssertionError("空拟合器删行应报错")
+    except ValueError:
+        pass
+    fit = OnlineLSQ(2, window=window)
+    t0 = time.perf_counter()
+    for i in range(m):
+        fit.add((1.0, t[i]), y[i])
+    elapsed = time.perf_counter() - t0
+    A = np.column_stack([np.ones(window), t[-window:]])
+    x_ref = np.linalg.lstsq(A, y[-window:], rcond=None)[0]
+    print(f"online fit: {m / elapsed:,.0f} rows/s (add + expire), refactorizations={fit.refactors}, "
+          f"|x - x_batch|={np.abs(fit.solve() - x_ref).max():.1e}")
+
+
 def vis(A,b):
     x_points=A[:,1]
     y_points=b
@@ -46,4 +259,26 @@ if __name__ == "__main__":
     A=np.array([[1,3],[1,4],[1,5],[1,6],[1,7],[1,8],[1,9],[1,10]],dtype=float)
     b=np.array([math.log(3),math.log(4),math.log(5),math.log(6),
                 math.log(7),math.log(8),math.log(9),math.log(10)])
-    vis(A,b)
\ No newline at end of file
+    vis(A,b)
+
+    # 大数据量：数据写进 memmap 文件，TSQR 按行块流式读取
+    m=4_000_000
+    path_A,path_b='best_line_A.bin','best_line_b.bin'
+    A_big=np.memmap(path_A,dtype=np.float64,mode='w+',shape=(m,2))
+    b_big=np.memmap(path_b,dtype=np.float64,mode='w+',shape=(m,))
+    rng=np.random.default_rng(0)
+    for s in range(0,m,1<<20):
+        t=rng.uniform(3,10,min(m,s+(1<<20))-s)
+        A_big[s:s+len(t),0]=1.0
+        A_big[s:s+len(t),1]=t
+        b_big[s:s+len(t)]=np.log(t)+0.01*rng.standard_normal(len(t))
+    A_big.flush(); b_big.flush()
+    t0=time.perf_counter()
+    x,res=tsqr_lstsq(zip(memmap_row_blocks(path_A,(m,2)),memmap_row_blocks(path_b,(m,))))
+    print(f"TSQR: m={m}, x={x}, ||Ax-b||={res:.6e}, {time.perf_counter()-t0:.2f}s")
+    x_ref,res_ref=np.linalg.lstsq(A_big,b_big,rcond=None)[:2]
+    print(f"lstsq: x={x_ref}, ||Ax-b||={math.sqrt(res_ref[0]):.6e}")
+    del A_big,b_big
+    os.remove(path_A); os.remove(path_b)
+
+    bench_online()
\ No newline at end of file
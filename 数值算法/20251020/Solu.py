@@ -1,5 +1,8 @@
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.linalg import solve_triangular
 #Q1 content
 def ridge_bidiagonal_givens(A, b, lam):
     m,n=A.shape
@@ -28,79 +31,145 @@ def ridge_bidiagonal_givens(A, b, lam):
         x[i]=(c_reduced[i]-R[i,i+1:]@x[i+1:])/R[i,i]
     return x
 
+class RidgePath:
+    """ridge 正则化路径：min ||Ax-b||² + λ||x||²。
+    只做一次 thin SVD A = U Σ V^T，之后对任意一组 λ：
+        x(λ) = V diag(σ/(σ²+λ)) U^T b，
+    残差、解的范数、GCV 和 L 曲线曲率都只用 σ 与 β = U^T b 的向量运算，对 λ 网格向量化。"""
+
+    def __init__(self, A, b):
+        A = np.asarray(A, dtype=float)
+        b = np.asarray(b, dtype=float)
+        self.m, self.n = A.shape
+        self.U, self.s, self.Vt = np.linalg.svd(A, full_matrices=False)
+        self.beta = self.U.T @ b
+        # b 在 A 的列空间之外的部分，对所有 λ 都是残差的常数项
+        self.res0 = np.linalg.norm(b - self.U @ self.beta) ** 2
+
+    def _filter(self, lams):
+        lams = np.atleast_1d(np.asarray(lams, dtype=float))[:, None]
+        s2 = self.s ** 2
+        return lams, s2 / (s2 + lams), self.s / (self.s ** 2 + lams)
+
+    def solutions(self, lams):
+        """每行一个 x(λ)，形状 (len(lams), n)"""
+        _, _, g = self._filter(lams)
+        return (g * self.beta) @ self.Vt
+
+    def evaluate(self, lams, solutions=True):
+        """返回 dict：x（可选）、residual_norm ||Ax-b||、solution_norm ||x||、
+        gcv = ||Ax-b||² / (m - tr H)²、curvature（L 曲线 (log||Ax-b||, log||x||) 的曲率，拐角处为正）"""
+        lams, f, g = self._filter(lams)
+        beta2 = self.beta ** 2
+        rho = np.sum(((1 - f) ** 2) * beta2, axis=1) + self.res0  # ||Ax-b||²
+        eta = np.sum((g ** 2) * beta2, axis=1)                    # ||x||²
+        gcv = rho / (self.m - np.sum(f, axis=1)) ** 2
+
+        # L 曲线 (log||Ax-b||, log||x||) 对 λ 求导：η' = -2 Σ σ²β²/(σ²+λ)³，ρ' = -λ η'
+        w = (g ** 2) * beta2 / (self.s ** 2 + lams)
+        lam = lams[:, 0]
+        deta = -2 * np.sum(w, axis=1)
+        d2eta = 6 * np.sum(w / (self.s ** 2 + lams), axis=1)
+        drho = -lam * deta
+        d2rho = -deta - lam * d2eta
+        dx, dy = drho / (2 * rho), deta / (2 * eta)
+        d2x = d2rho / (2 * rho) - 2 * dx ** 2
+        d2y = d2eta / (2 * eta) - 2 * dy ** 2
+        curv = (dx * d2y - dy * d2x) / (dx ** 2 + dy ** 2) ** 1.5
+
+        out = {"lam": lams[:, 0], "residual_norm": np.sqrt(rho), "solution_norm": np.sqrt(eta),
+               "gcv": gcv, "curvature": curv}
+        if solutions:
+            out["x"] = (g * self.beta) @ self.Vt
+        return out
+
+    def best(self, lams, criterion="gcv"):
+        """在 λ 网格上按 GCV 最小或 L 曲线曲率最大选取 λ，返回 (λ, x(λ))"""
+        path = self.evaluate(lams, solutions=False)
+        k = np.argmin(path["gcv"]) if criterion == "gcv" else np.argmax(path["curvature"])
+        return path["lam"][k], self.solutions(path["lam"][k])[0]
+
 #Q2 content
-def householder_qr_Ct(C):
+def _householder_panel(P):
+    """对面板 P (m x b) 就地做不分块 Householder QR（LAPACK geqr2 约定）。
+    返回 V (m x b，单位下梯形，v_j[j] = 1) 和 taus，H_j = I - tau_j v_j v_j^T；
+    P 的上三角被 R 覆盖，对角线以下清零。"""
+    m, b = P.shape
+    V = np.zeros((m, b))
+    taus = np.zeros(b)
+    for j in range(min(m, b)):
+        x = P[j:, j]
+        normx = np.linalg.norm(x)
+        V[j, j] = 1.0
+        if normx == 0:
+            continue
+        alpha = -np.copysign(normx, x[0])
+        v = x / (x[0] - alpha)
+        v[0] = 1.0
+        taus[j] = tau = (alpha - x[0]) / alpha
+        V[j + 1:, j] = v[1:]
+        P[j:, j + 1:] -= np.outer(tau * v, v @ P[j:, j + 1:])
+        P[j, j] = alpha
+        P[j + 1:, j] = 0.0
+    return V, taus
+
+
+def _larft(V, taus):
+    """由 V、taus 构造紧凑 WY 的上三角 T，使 H_1 H_2 ... H_k = I - V T V^T"""
+    k = len(taus)
+    T = np.zeros((k, k))
+    G = V.T @ V
+    for i in range(k):
+        T[:i, i] = -taus[i] * (T[:i, :i] @ G[:i, i])
+        T[i, i] = taus[i]
+    return T
+
+
+def householder_qr_Ct(C, nb=32):
     """
-    对 C^T (形状 n x p) 做 Householder QR（只做前 p 次反射）。
+    对 C^T (形状 n x p) 做分块 Householder QR：C^T = Q [R; 0]，Q = H_1 H_2 ... H_p = I - V T V^T。
     输入:
         C: shape (p, n)
+        nb: 面板宽度
     返回:
-        R: shape (p, p) 上三角矩阵，使得 C^T 被反射后前 p 行 = R
-        vs: list of length p，每个是长度 n 的反射向量 v (第 k 个反射从位置 k 开始非零)
-        taus: list of length p，每个是对应的 tau
+        R: shape (p, p) 上三角矩阵
+        V: shape (n, p) 打包存放的反射向量（单位下梯形，第 k 列从第 k 个位置开始非零）
+        T: shape (p, p) 紧凑 WY 形式的上三角因子
     说明:
-        在原 Ct = C.T (n x p) 上原地做变换以得到 R，返回的 vs, taus 可以用于
-        右乘变换 A <- A * H_k (H_k = I - tau v v^T) 或用于作用于向量 y。
+        每个面板内逐列做反射，面板外的尾部列用 (I - V_p T_p V_p^T)^T 一次作用（矩阵乘法），
+        面板的 T_p 再按 T = [[T1, -T1 V1^T V2 T2], [0, T2]] 拼成整体的 T。
     """
-    C = np.asarray(C)
+    C = np.asarray(C, dtype=float)
     p, n = C.shape
     Ct = C.T.copy()   # Ct: n x p
-    n_rows, n_cols = Ct.shape
-    vs = []
-    taus = []
-    for k in range(n_cols):
-        x = Ct[k:, k].copy()
-        normx = np.linalg.norm(x)
-        if normx == 0:
-            tau = 0.0
-            v = np.zeros_like(x)
-            v[0] = 1.0
-        else:
-            alpha = -np.sign(x[0]) * normx
-            v_small = x.copy()
-            v_small[0] -= alpha
-            v_small = v_small / np.linalg.norm(v_small)
-            tau = 2.0
-            v = v_small
-        v_full = np.zeros(n_rows)
-        v_full[k:] = v
-        if tau != 0.0:
-            sub = Ct[k:, k:]
-            vt_sub = v @ sub
-            sub -= np.outer(v, tau * vt_sub)
-            Ct[k:, k:] = sub
-        vs.append(v_full)
-        taus.append(tau)
-    R = Ct[:p, :].T.copy()  # shape p x p
-    return R, vs, taus
-
-def apply_reflectors_right(A, vs, taus):
+    V = np.zeros((n, p))
+    T = np.zeros((p, p))
+    for j0 in range(0, p, nb):
+        j1 = min(j0 + nb, p)
+        Vp, taus = _householder_panel(Ct[j0:, j0:j1])
+        Tp = _larft(Vp, taus)
+        V[j0:, j0:j1] = Vp
+        if j1 < p:
+            Ct[j0:, j1:] -= Vp @ (Tp.T @ (Vp.T @ Ct[j0:, j1:]))
+        if j0 > 0:
+            T[:j0, j0:j1] = -T[:j0, :j0] @ (V[j0:, :j0].T @ Vp) @ Tp
+        T[j0:j1, j0:j1] = Tp
+    R = np.triu(Ct[:p, :])  # shape p x p
+    return R, V, T
+
+def apply_reflectors_right(A, V, T):
     """
-    对矩阵 A (m x n) 做右乘一系列反射器 H_k=I-tau_k v_k v_k^T，
-    即 A <- A * H1 * H2 * ... （按 vs, taus 的顺序）
-    vs 中每个 v 长度为 n。
+    A Q = A (I - V T V^T)，A: (m x n)，两次矩阵乘法完成全部 p 个反射。
     """
-    A = A.copy()
-    for v, tau in zip(vs, taus):
-        if tau == 0.0:
-            continue
-        Av = A @ v
-        A -= np.outer(Av, tau * v)
-    return A
+    A = np.asarray(A, dtype=float)
+    return A - ((A @ V) @ T) @ V.T
 
-def apply_reflectors_left_vec(y, vs, taus):
+def apply_reflectors_left_vec(y, V, T):
     """
-    将 y (长度 n) 左乘 Q = H1 H2 ... （反射器按顺序）：
-    y <- Q y
-    注意这里 Hk 都是作用在长度 n 向量上的。
+    Q y = (I - V T V^T) y，y 可以是长度 n 的向量或 (n, k) 矩阵。
     """
-    y = y.copy()
-    for v, tau in zip(vs, taus):
-        if tau == 0.0:
-            continue
-        vy = v @ y
-        y -= tau * v * vy
-    return y
+    y = np.asarray(y, dtype=float)
+    return y - V @ (T @ (V.T @ y))
 
 def solve_lse_via_qr_ct(A, b, C, d, rcond=1e-12):
     """
@@ -115,13 +184,13 @@ def solve_lse_via_qr_ct(A, b, C, d, rcond=1e-12):
     p = C.shape[0]
     assert C.shape[1] == n
     assert d.shape[0] == p
-    # 1. 对 C^T 做 Householder QR，得到 R (p x p) 和反射器
-    R, vs, taus = householder_qr_Ct(C)
-    # 2. 解 R^T y1 = d  -> y1 长度 p
+    # 1. 对 C^T 做 Householder QR，得到 R (p x p) 和紧凑 WY 形式的 Q
+    R, V, T = householder_qr_Ct(C)
+    # 2. C x = [R^T 0] Q^T x，令 y = Q^T x，解 R^T y1 = d  -> y1 长度 p
     # 注意 R 是上三角，R^T 是下三角
     y1 = np.linalg.solve(R.T, d)
-    # 3. 用反射器把 A 右乘 Q （不显式构造 Q）
-    AQ = apply_reflectors_right(A, vs, taus)  # shape m x n
+    # 3. 把 A 右乘 Q （不显式构造 Q）
+    AQ = apply_reflectors_right(A, V, T)  # shape m x n
     A1 = AQ[:, :p] if p > 0 else np.zeros((m, 0))
     A2 = AQ[:, p:] if p < n else np.zeros((m, 0))
     # 4. 构造 b_hat = b - A1 y1
@@ -135,42 +204,111 @@ def solve_lse_via_qr_ct(A, b, C, d, rcond=1e-12):
     # 6. 合并 y，并恢复 x = Q y（Q = H1 H2 ...）
     y = np.concatenate([y1, y2]) if p < n else y1.copy()
     # 7. x = Q y
-    x = apply_reflectors_left_vec(y, vs, taus)
+    x = apply_reflectors_left_vec(y, V, T)
     return x
 
-def test_random(seed=0, trials=5):
+class LSESolver:
+    """
+    A、C 固定、(b, d) 反复变化的等式约束最小二乘 min ||Ax - b|| s.t. Cx = d。
+    构造时一次完成：C^T 的 QR（紧凑 WY）、AQ = [A1 A2]、A2 的 QR；
+    之后每次 solve 只剩两次三角求解和若干矩阵乘法，B、D 的各列一起求解。
+    A2 列亏秩时改为缓存 A2 的 SVD，按 rcond 截断得到最小范数解（与 lstsq 相同）。
+    """
+
+    def __init__(self, A, C, rcond=1e-12):
+        A = np.asarray(A, dtype=float)
+        C = np.asarray(C, dtype=float)
+        m, n = A.shape
+        p = C.shape[0]
+        assert C.shape[1] == n
+        self.p = p
+        self.R, self.V, self.T = householder_qr_Ct(C)
+        AQ = apply_reflectors_right(A, self.V, self.T)
+        self.A1, A2 = AQ[:, :p], AQ[:, p:]
+
+        self.Q2 = self.R2 = self.svd = None
+        if A2.shape[1] > 0:
+            if m >= A2.shape[1]:
+                Q2, R2 = np.linalg.qr(A2)
+                diag = np.abs(np.diag(R2))
+                if diag.min() > rcond * diag.max():
+                    self.Q2, self.R2 = Q2, R2
+            if self.R2 is None:
+                U, sv, Vt = np.linalg.svd(A2, full_matrices=False)
+                keep = sv > rcond * sv[0]
+                self.svd = (U[:, keep], sv[keep], Vt[keep])
+
+    def solve(self, B, D):
+        """B: (m,) 或 (m, k)，D: (p,) 或 (p, k)，返回 x: (n,) 或 (n, k)"""
+        B = np.asarray(B, dtype=float)
+        D = np.asarray(D, dtype=float)
+        y1 = solve_triangular(self.R, D, trans='T') if self.p > 0 else D
+        b_hat = B - self.A1 @ y1
+        if self.R2 is not None:
+            y2 = solve_triangular(self.R2, self.Q2.T @ b_hat)
+        elif self.svd is not None:
+            U, sv, Vt = self.svd
+            y2 = Vt.T @ ((U.T @ b_hat) / sv.reshape(-1, *([1] * (b_hat.ndim - 1))))
+        else:
+            y2 = np.zeros((0,) + b_hat.shape[1:])
+        return apply_reflectors_left_vec(np.concatenate([y1, y2]), self.V, self.T)
+
+def test_random(seed=0, sizes=((60, 20, 6, 200), (400, 150, 40, 500), (2000, 600, 100, 200)), loop_max=20):
+    """
+    吞吐量对比：每组 (m, n, p, k) 固定 A、C，求解 k 组 (b, d)。
+    未缓存：逐组调用 solve_lse_via_qr_ct（只跑前 loop_max 组计时）；缓存：LSESolver 构造一次，一次批量 solve。
+    对第一组 (b, d) 用 KKT 方程组检验正确性。
+    """
     rng = np.random.default_rng(seed)
-    for t in range(trials):
-        m = rng.integers(10, 60)
-        n = rng.integers(6, 20)
-        p = rng.integers(0, min(n, 6)+1)  # 最多 6 个约束，且 p<=n
+    for m, n, p, k in sizes:
         A = rng.standard_normal((m, n))
-        x_true = rng.standard_normal(n)
-        C = rng.standard_normal((p, n)) if p > 0 else np.zeros((0, n))
-        d = C @ x_true if p > 0 else np.zeros(0)
-        b = A @ x_true + 0.1 * rng.standard_normal(m)  # 加少量噪声
-        x_hat = solve_lse_via_qr_ct(A, b, C, d)
-        ATA = A.T @ A
-        ATb = A.T @ b
-        if p > 0:
-            KKT = np.block([[ATA, C.T],
-                            [C, np.zeros((p, p))]])
-            rhs = np.concatenate([ATb, d])
-            sol = np.linalg.lstsq(KKT, rhs, rcond=None)[0]
-            x_kkt = sol[:n]
-        else:
-            x_kkt, *_ = np.linalg.lstsq(A, b, rcond=None)
-        err_x = np.linalg.norm(x_hat - x_kkt) / max(1.0, np.linalg.norm(x_kkt))
-        res_norm = np.linalg.norm(A @ x_hat - b)
-        cons_violation = np.linalg.norm(C @ x_hat - d) if p > 0 else 0.0
-        print(f"trial {t}: m={m}, n={n}, p={p}, rel_err_x={err_x:.3e}, ||Ax-b||={res_norm:.3e}, ||C x - d||={cons_violation:.3e}")
+        C = rng.standard_normal((p, n))
+        X_true = rng.standard_normal((n, k))
+        D = C @ X_true
+        B = A @ X_true + 0.1 * rng.standard_normal((m, k))  # 加少量噪声
 
-if __name__ == "__main__":
-    test_random(seed=42, trials=8)
+        t0 = time.perf_counter()
+        k_loop = min(k, loop_max)
+        X_loop = np.column_stack([solve_lse_via_qr_ct(A, B[:, j], C, D[:, j]) for j in range(k_loop)])
+        t1 = time.perf_counter()
+        solver = LSESolver(A, C)
+        t2 = time.perf_counter()
+        X = solver.solve(B, D)
+        t3 = time.perf_counter()
+
+        KKT = np.block([[A.T @ A, C.T],
+                        [C, np.zeros((p, p))]])
+        x_kkt = np.linalg.solve(KKT, np.concatenate([A.T @ B[:, 0], D[:, 0]]))[:n]
+        err_x = np.linalg.norm(X[:, 0] - x_kkt) / max(1.0, np.linalg.norm(x_kkt))
+        cons_violation = np.max(np.abs(C @ X - D))
+        diff = np.max(np.abs(X[:, :k_loop] - X_loop))
+        print(f"m={m}, n={n}, p={p}, k={k}: 未缓存 {k_loop / (t1 - t0):.0f} 组/s, "
+              f"缓存 分解 {t2 - t1:.3f}s + 求解 {t3 - t2:.4f}s ({k / (t3 - t1):.0f} 组/s); "
+              f"两者差 {diff:.1e}, rel_err_x(KKT)={err_x:.1e}, max|CX - D|={cons_violation:.1e}")
 
+def ridge_path_demo(m=200, n=80, n_lams=200, seed=0):
+    """一次 SVD 得到整条 ridge 路径，与逐个 λ 调用 ridge_bidiagonal_givens 对比"""
+    rng = np.random.default_rng(seed)
+    A = rng.standard_normal((m, n)) @ np.diag(np.logspace(0, -6, n))
+    b = A @ rng.standard_normal(n) + 1e-4 * rng.standard_normal(m)
+    lams = np.logspace(-14, 0, n_lams)
+
+    t0 = time.perf_counter()
+    path = RidgePath(A, b).evaluate(lams)
+    t1 = time.perf_counter()
+    k = np.argmin(path["gcv"])
+    j = np.argmax(path["curvature"])
+    print(f"RidgePath: {n_lams} 个 λ 共 {t1 - t0:.4f}s，GCV 选 λ={lams[k]:.2e}，L 曲线拐角 λ={lams[j]:.2e}")
+
+    t0 = time.perf_counter()
+    x = ridge_bidiagonal_givens(A, b, lams[k])
+    t1 = time.perf_counter()
+    print(f"ridge_bidiagonal_givens: 单个 λ {t1 - t0:.4f}s，与路径解相对差 "
+          f"{np.linalg.norm(x - path['x'][k]) / np.linalg.norm(x):.2e}")
 
 #Q5 content
-def power_iteration_history(A,tol=1e-20,max_iter=1000):
+def power_iteration_history(A,tol=1e-12,max_iter=1000):
+    """幂法估计谱半径；相邻两次估计的相对变化小于 tol 时停止（tol 不应低于机器精度）"""
     n=A.shape[0]
     u=np.ones(n)
     rho_history=[]
@@ -180,20 +318,151 @@ def power_iteration_history(A,tol=1e-20,max_iter=1000):
         rho=np.linalg.norm(y,ord=np.inf)
         rho_history.append(rho)
         u=y/rho
-        if abs(rho-prev_rho)<tol:
+        if abs(rho-prev_rho)<tol*rho:
             break
         prev_rho=rho
     return rho_history
 
-np.random.seed(98)
-A=np.random.rand(1000, 1000)
+def as_matmat(A):
+    """把 ndarray、稀疏矩阵、LinearOperator 或函数 X -> A X 统一成作用于 (n, b) 块的函数"""
+    if callable(A) and not hasattr(A, "shape"):
+        return A
+    if hasattr(A, "matmat"):
+        return A.matmat
+    return lambda X: A @ X
+
+def _chebyshev_filter(matmat, X, AX, lo, hi, a0, degree):
+    """以 [lo, hi] 为需压制区间的 degree 次 Chebyshev 多项式作用于 X（Zhou-Saad 缩放递推，在 a0 处归一化）。
+    AX = A X 已算好，作为第一步复用。"""
+    e, c = (hi - lo) / 2, (hi + lo) / 2
+    sigma = sigma1 = e / (a0 - c)
+    Y = (AX - c * X) * (sigma1 / e)
+    for _ in range(2, degree + 1):
+        sigma2 = 1.0 / (2.0 / sigma1 - sigma)
+        Y, X = (2.0 * sigma2 / e) * (matmat(Y) - c * Y) - (sigma * sigma2) * X, Y
+        sigma = sigma2
+    return Y
 
-convergence_history = power_iteration_history(A)
+def subspace_iteration(A, k, n=None, block=None, tol=1e-8, maxiter=1000, symmetric=False,
+                       chebyshev=None, spectrum_lower=None, X0=None, dtype=None, seed=0):
+    """
+    块幂法（子空间迭代）+ Rayleigh-Ritz，求模最大的 k 个特征对。
+    A: ndarray / 稀疏矩阵 / LinearOperator / 函数 X -> A X；函数形式需给出 n。
+    block: 迭代块大小（默认 k + max(k, 4)，多出的列加快收敛）。
+    每步 Y = A X 后在当前子空间上做 Rayleigh-Ritz，第 j 个 Ritz 对的相对残差
+        ||A y_j - θ_j y_j|| / |θ_j|
+    不大于 tol 即视为收敛；前 k 个全部收敛时停止。
+    chebyshev: 对称矩阵可给多项式次数，压制区间为 [-|θ_block|, |θ_block|]（θ_block 为块内最小的 Ritz 值）；
+        已知谱的下界（如半正定矩阵为 0）时用 spectrum_lower 给出，压制区间改为 [spectrum_lower, |θ_block|]。
+    返回 theta (k,), vectors (n, k), info：iterations、matvecs、converged_at（各特征对首次收敛的步数，
+    未收敛为 -1）、residuals（每步各特征对的相对残差）。
+    """
+    matmat = as_matmat(A)
+    if n is None:
+        n = A.shape[0]
+    if dtype is None:
+        dtype = getattr(A, "dtype", None)
+        if dtype is None:
+            dtype = X0.dtype if X0 is not None else np.float64
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.inexact):
+        dtype = np.dtype(np.float64)
+    if chebyshev and not symmetric:
+        raise ValueError("Chebyshev 加速只用于对称矩阵（实谱）")
+    b = min(n, block or k + max(k, 4))
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, b)).astype(dtype) if X0 is None else np.asarray(X0, dtype=dtype)
+    X, _ = np.linalg.qr(X)
 
-plt.figure(figsize=(10, 6))
-plt.plot(convergence_history, '-o', markersize=4)
-plt.xlabel('Iteration Times')
-plt.ylabel('Estimated Spectral Radius')
-plt.title('Convergence of Power Iteration for $\\rho(A)$')
-plt.grid(True)
-plt.show()
\ No newline at end of file
+    history = []
+    converged_at = np.full(k, -1)
+    matvecs = 0
+    for it in range(maxiter):
+        AX = matmat(X)
+        matvecs += b
+        H = X.T @ AX
+        if symmetric:
+            theta, S = np.linalg.eigh((H + H.T) / 2)
+        else:
+            theta, S = np.linalg.eig(H)
+        order = np.argsort(-np.abs(theta))
+        theta, S = theta[order], S[:, order]
+        res = np.linalg.norm(AX @ S - (X @ S) * theta, axis=0) / np.maximum(np.abs(theta), np.finfo(dtype).tiny)
+        history.append(res[:k])
+        newly = (converged_at < 0) & (res[:k] <= tol)
+        converged_at[newly] = it
+        if np.all(converged_at >= 0):
+            break
+        if chebyshev and chebyshev > 1 and it > 0:
+            # 对称时 X S 即 Ritz 向量；按 Ritz 值排序后再滤波
+            hi = abs(theta[-1])
+            lo = -hi if spectrum_lower is None else spectrum_lower
+            Y = _chebyshev_filter(matmat, X @ S, AX @ S, lo, hi, abs(theta[0]), chebyshev)
+            matvecs += (chebyshev - 1) * b
+        else:
+            Y = AX @ S if symmetric else AX
+        X, _ = np.linalg.qr(Y)
+
+    vectors = X @ S[:, :k]
+    if np.iscomplexobj(vectors) and not np.any(theta[:k].imag):
+        theta, vectors = theta.real, vectors.real
+    info = {"iterations": it + 1, "matvecs": matvecs, "converged_at": converged_at,
+            "residuals": np.array(history)}
+    return theta[:k], vectors, info
+
+def power_iteration_demo():
+    np.random.seed(98)
+    A=np.random.rand(1000, 1000)
+
+    convergence_history = power_iteration_history(A)
+    print(f"幂法: {len(convergence_history)} 次迭代, ρ(A) ≈ {convergence_history[-1]:.12f}")
+    theta, _, info = subspace_iteration(A, k=1, tol=1e-12)
+    print(f"子空间迭代（非对称, k=1）: {info['iterations']} 步, {info['matvecs']} 次矩阵向量乘, θ = {theta[0].real:.12f}")
+
+    # 免组装的对称算子 A = H diag(λ) H，H = I - 2uu^T，λ 均匀分布于 (0, 1]，前几个特征值间隔只有 1/n
+    n = 2000
+    lam = np.arange(1, n + 1) / n
+    u = np.random.randn(n)
+    u /= np.linalg.norm(u)
+
+    def make_op(dtype):
+        lam_, u_ = lam.astype(dtype), u.astype(dtype)
+        def matmat(X):
+            Y = X - 2 * np.outer(u_, u_ @ X)
+            Y *= lam_[:, None]
+            return Y - 2 * np.outer(u_, u_ @ Y)
+        return matmat
+
+    for dtype, tol in ((np.float64, 1e-8), (np.float32, 1e-4)):
+        for deg in (None, 8):
+            theta, _, info = subspace_iteration(make_op(dtype), k=4, n=n, block=8, tol=tol, symmetric=True,
+                                                chebyshev=deg, spectrum_lower=0.0, dtype=dtype, maxiter=20000)
+            print(f"{np.dtype(dtype).name}, chebyshev={deg}: {info['iterations']} 步, {info['matvecs']} 次矩阵向量乘, "
+                  f"各特征对收敛步数 {info['converged_at']}, 最大误差 {np.max(np.abs(theta - lam[::-1][:4])):.1e}")
+
+    # 稀疏矩阵直接传入
+    import scipy.sparse as sp
+    m = 200
+    L = sp.diags([-np.ones(m - 1), 2 * np.ones(m), -np.ones(m - 1)], [-1, 0, 1], format='csr')
+    theta, _, info = subspace_iteration(L, k=2, tol=1e-8, symmetric=True, chebyshev=8, spectrum_lower=0.0,
+                                        maxiter=20000)
+    exact = 2 - 2 * np.cos(np.pi * np.arange(m, m - 2, -1) / (m + 1))
+    print(f"稀疏 Laplace: {info['iterations']} 步, 误差 {np.max(np.abs(theta - exact)):.1e}")
+
+    fig, ax = plt.subplots(1, 2, figsize=(14, 6))
+    ax[0].plot(convergence_history, '-o', markersize=4)
+    ax[0].set_xlabel('Iteration Times')
+    ax[0].set_ylabel('Estimated Spectral Radius')
+    ax[0].set_title('Convergence of Power Iteration for $\\rho(A)$')
+    ax[0].grid(True)
+    ax[1].semilogy(info['residuals'])
+    ax[1].set_xlabel('Iteration Times')
+    ax[1].set_ylabel('relative residual')
+    ax[1].set_title('Subspace iteration, per eigenpair')
+    ax[1].grid(True)
+    plt.show()
+
+if __name__ == "__main__":
+    ridge_path_demo()
+    test_random(seed=42)
+    power_iteration_demo()
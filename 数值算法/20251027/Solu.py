@@ -1,20 +1,42 @@
+import os
+import sys
+
 import numpy as np
 import time
 import matplotlib.pyplot as plt
-from scipy.linalg import hilbert, lu_factor, lu_solve, norm
+from scipy.linalg import hessenberg, hilbert, lu_factor, lu_solve, norm, solve_banded
+
+# 矩阵指纹与分解缓存各次作业共用，见 ../factor_cache.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from factor_cache import FactorCache, fingerprint
+
+_factor_cache = FactorCache()
+
+
+def shifted_lu(A, mu, cache=_factor_cache, fp=None):
+    """A - mu I 的 LU 分解（scipy lu_factor 格式），经 cache 复用；
+    对同一矩阵扫描多个位移时可传入预先算好的指纹 fp，省去每次哈希。"""
+    def factor():
+        Ash = np.array(A, dtype=np.result_type(A, mu, np.float64))
+        Ash.flat[::Ash.shape[0] + 1] -= mu
+        return lu_factor(Ash)
+    if cache is None:
+        return factor()
+    return cache.get((fp or fingerprint(A), "lu", complex(mu)), factor)
+
 
 #Q3 content
-def invit(A, mu, max_it=100, tol=1e-10):
+def invit(A, mu, max_it=100, tol=1e-10, cache=_factor_cache, fp=None):
     n = A.shape[0]
     x = np.random.randn(n)
     x = x / np.linalg.norm(x)
     eigs = []
     res = []
-    Ash = A - mu * np.eye(n)
-    lu, piv = lu_factor(Ash)
+    lu, piv = shifted_lu(A, mu, cache, fp)
     for i in range(max_it):
         y = lu_solve((lu, piv), x)
-        rq = (x.T @ A @ x) / (x.T @ x)
+        # (A - mu I) y = x => y 的 Rayleigh 商为 mu + y^T x / y^T y，不必再做一次 A @ x
+        rq = mu + (y @ x) / (y @ y)
         eigs.append(rq)
         x_new = y / np.linalg.norm(y)
         r = np.linalg.norm(x_new - x)
@@ -46,6 +68,99 @@ def rqi(A, mu0, max_it=100, tol=1e-12):
             break
     return eigs, res, i + 1
 
+class TridiagonalEig:
+    """对称矩阵一次约化为三对角 T = Q^T A Q（O(n^3)，只做一次），
+    之后反迭代 / RQI 每一步只需一次 O(n) 的带状求解和 O(n) 的 T @ x，收敛后再用 Q 变回原基。"""
+
+    def __init__(self, A):
+        H, Q = hessenberg(np.asarray(A, dtype=np.float64), calc_q=True)
+        self.n = H.shape[0]
+        self.d = np.diag(H).copy()
+        self.e = (np.diag(H, -1) + np.diag(H, 1)) / 2
+        self.Q = Q
+
+    def matvec(self, z):
+        """T z"""
+        y = self.d * z
+        y[:-1] += self.e * z[1:]
+        y[1:] += self.e * z[:-1]
+        return y
+
+    def shifted_solve(self, mu, z):
+        """解 (T - mu I) y = z，部分选主元的带状 LU，O(n)。
+        mu 恰为特征值时 T - mu I 奇异，把位移挪开 ε‖T‖ 量级再解，得到的 y 几乎就是对应的特征向量"""
+        ab = np.zeros((3, self.n))
+        ab[0, 1:] = self.e
+        ab[2, :-1] = self.e
+        delta = np.finfo(float).eps * max(np.abs(self.d).max() + 2 * np.abs(self.e).max(initial=0.0), 1.0)
+        for _ in range(8):
+            ab[1] = self.d - mu
+            try:
+                return solve_banded((1, 1), ab, z, check_finite=False)
+            except np.linalg.LinAlgError:
+                mu += delta
+                delta *= 16
+        raise np.linalg.LinAlgError("T - mu I 奇异，挪动位移后仍无法求解")
+
+    def _start(self, z0, rng):
+        z = rng.standard_normal(self.n) if z0 is None else np.asarray(z0, dtype=float)
+        return z / np.linalg.norm(z)
+
+    def _invit(self, mu, max_it, tol, z0, rng):
+        z = self._start(z0, rng)
+        eigs, res = [], []
+        for i in range(max_it):
+            y = self.shifted_solve(mu, z)
+            eigs.append(mu + (y @ z) / (y @ y))
+            z_new = y / np.linalg.norm(y)
+            r = min(np.linalg.norm(z_new - z), np.linalg.norm(z_new + z))
+            res.append(r)
+            z = z_new
+            if r < tol:
+                break
+        return eigs[-1], z, eigs, res, i + 1
+
+    def _rqi(self, mu0, max_it, tol, z0, rng, invit_steps):
+        z = self._start(z0, rng)
+        mu = mu0
+        eigs, res = [], []
+        for i in range(max_it):
+            y = self.shifted_solve(mu, z)
+            z = y / np.linalg.norm(y)
+            Tz = self.matvec(z)
+            rq = z @ Tz
+            if i >= invit_steps:
+                mu = rq
+            eigs.append(rq)
+            r = np.linalg.norm(Tz - rq * z)
+            res.append(r)
+            if r < tol:
+                break
+        return eigs[-1], z, eigs, res, i + 1
+
+    def invit(self, mu, max_it=100, tol=1e-10, z0=None, rng=None):
+        """固定位移反迭代；返回 (特征值, 原基下的特征向量, eigs, res, 迭代次数)"""
+        lam, z, eigs, res, it = self._invit(mu, max_it, tol, z0, rng or np.random.default_rng())
+        return lam, self.Q @ z, eigs, res, it
+
+    def rqi(self, mu0, max_it=100, tol=1e-12, z0=None, rng=None, invit_steps=0):
+        """Rayleigh 商迭代，前 invit_steps 步先用固定位移 mu0 把向量拉向 mu0 附近的特征向量；
+        返回 (特征值, 原基下的特征向量, eigs, res, 迭代次数)"""
+        lam, z, eigs, res, it = self._rqi(mu0, max_it, tol, z0, rng or np.random.default_rng(), invit_steps)
+        return lam, self.Q @ z, eigs, res, it
+
+    def batch(self, shifts, method="rqi", max_it=100, tol=1e-12, invit_steps=3, seed=0):
+        """对多个位移 / 目标特征值逐个迭代（每步 O(n)），迭代期间留在三对角基下，
+        最后一次矩阵乘法变回原基。返回 (特征值数组, 特征向量矩阵 (n, k), 各自迭代次数)"""
+        rng = np.random.default_rng(seed)
+        if method == "rqi":
+            out = [self._rqi(mu, max_it, tol, None, rng, invit_steps) for mu in shifts]
+        else:
+            out = [self._invit(mu, max_it, tol, None, rng) for mu in shifts]
+        vals = np.array([o[0] for o in out])
+        Z = np.column_stack([o[1] for o in out])
+        return vals, self.Q @ Z, np.array([o[4] for o in out])
+
 np.random.seed(42)
 n = 200
 A = hilbert(n)
@@ -67,6 +182,38 @@ print(f"Eig: {e2[-1]:.15f}")
 print(f"It: {it2}")
 print(f"Time: {t2:.6f}s")
 
+print("\nTridiagonal RQI:")
+t0 = time.time()
+tri = TridiagonalEig(A)
+t_red = time.time() - t0
+t0 = time.time()
+e3, v3, eigs3, r3, it3 = tri.rqi(mu)
+t3 = time.time() - t0
+print(f"Eig: {e3:.15f}")
+print(f"It: {it3}")
+print(f"Time: reduce {t_red:.6f}s + iterate {t3:.6f}s, ||Av - λv|| = {np.linalg.norm(A @ v3 - e3 * v3):.2e}")
+
+shifts = [2.0, 1.0, 0.3, 0.08, 0.02]
+t0 = time.time()
+vals, V, its = tri.batch(shifts)
+print(f"Batch RQI ({len(shifts)} shifts): {time.time() - t0:.6f}s, eigs = {vals}, its = {its}")
+print(f"max ||Av - λv|| = {np.max(np.linalg.norm(A @ V - V * vals, axis=0)):.2e}")
+
+# 位移恰为特征值：T - mu I 奇异，两种迭代都应直接收敛到该特征值
+tri_diag = TridiagonalEig(np.diag([1.0, 2.0, 3.0]))
+for name, (lam, v, *_) in (("RQI", tri_diag.rqi(2.0)), ("INVIT", tri_diag.invit(2.0))):
+    assert abs(lam - 2.0) < 1e-12 and abs(abs(v[1]) - 1) < 1e-12, (name, lam, v)
+print("Exact-eigenvalue shift: OK")
+
+# 位移扫描重复两遍：第二遍的 LU 全部来自缓存
+_factor_cache.clear()
+fp = fingerprint(A)
+for sweep in range(2):
+    t0 = time.time()
+    for m in np.linspace(0.01, 2.5, 20):
+        invit(A, m, fp=fp)
+    print(f"INVIT sweep {sweep}: {time.time() - t0:.4f}s, cache {_factor_cache.stats()}")
+
 plt.figure(figsize=(12, 4))
 
 plt.subplot(1, 3, 1)
@@ -94,19 +241,54 @@ plt.show()
 
 
 #Q4 content
+def triangular_eigvecs(T, nb=64):
+    """上三角矩阵 T 的全部特征向量，X[:, i] 对应特征值 T[i, i]（X 为上三角，列已单位化）。
+    第 i 列满足 X[i, i] = 1，对 j < i：X[j, i] = -(T[j, j+1:] @ X[j+1:, i]) / (T[j, j] - T[i, i])，
+    自下而上逐行计算时同一行对所有列一次算完。按 nb 行分块：块外（下方已算好的行）的贡献
+    用一次矩阵乘法 T[j0:j1, j1:] @ X[j1:, j1:] 得到，块内再逐行递推。
+    仿照 LAPACK trevc / dlaln2：|T[j, j] - T[i, i]| 小于 max(ε|T[i, i]|, smallnum) 时以该下界代替；
+    除法之前先检查 |num| > big |den|，是则把该列（连同该块已算的累加项）缩小到商恰为 big 再除，
+    X 的元素始终不超过 big = 1/sqrt(smallnum)，累加 num 时也不会溢出；最后统一单位化。"""
+    T = np.asarray(T)
+    n = T.shape[0]
+    dtype = np.result_type(T, np.float64)
+    eps = np.finfo(dtype).eps
+    smallnum = np.finfo(dtype).tiny / eps
+    big = 1.0 / np.sqrt(smallnum)
+    lam = np.diag(T).astype(dtype)
+    smin = np.maximum(eps * np.abs(lam), smallnum)
+
+    X = np.zeros((n, n), dtype=dtype)
+    X[np.arange(n), np.arange(n)] = 1.0
+    for j1 in range(n, 0, -nb):
+        j0 = max(j1 - nb, 0)
+        # W[r, c - j0] 为第 j0 + r 行对第 c 列已累加的 T[j, :] @ X[:, c]
+        W = np.zeros((j1 - j0, n - j0), dtype=dtype)
+        W[:, j1 - j0:] = T[j0:j1, j1:] @ X[j1:, j1:]
+        for j in range(j1 - 1, j0 - 1, -1):
+            r = j - j0
+            cols = slice(j + 1, n)
+            num = W[r, r + 1:] + T[j, j + 1:j1] @ X[j + 1:j1, cols]
+            den = T[j, j] - lam[cols]
+            small = np.abs(den) < smin[cols]
+            if np.any(small):
+                den = np.where(small, np.where(den.real < 0, -1.0, 1.0) * smin[cols], den)
+            grow = np.abs(num) > big * np.abs(den)
+            if np.any(grow):
+                scale = big * np.abs(den[grow]) / np.abs(num[grow])
+                c = np.flatnonzero(grow) + j + 1
+                X[:, c] *= scale
+                W[:, c - j0] *= scale
+                num[grow] *= scale
+            X[j, cols] = -num / den
+    X /= np.abs(X).max(axis=0)  # 先按最大元缩放，求 2-范数时不会溢出
+    X /= np.linalg.norm(X, axis=0)
+    return X
+
+
 def eig_back_sub(A):
-    n=A.shape[0]
-    eig_list=[]
-    for i in range(n):
-        u=A[i,i]
-        B=A-u*np.eye(n)
-        x=np.zeros(n,dtype=float)
-        x[i]=1
-        for j in range(i-1,-1,-1):
-                x[j]=-(B[j,j+1:]@x[j+1:])/B[j,j]
-        x/=np.linalg.norm(x)
-        eig_list.append(x)
-    return eig_list
+    # 逐个特征值回代的旧接口，改为一次算出全部特征向量
+    return list(triangular_eigvecs(A).T)
 
 np.random.seed(0)
 
@@ -127,6 +309,24 @@ for size in [10,100,1000]:
 
     print(f"n={size}: max eigenvector error = {max_err:.2e}")
 
+# 大规模：一次求全部特征向量，残差 max|T X - X Λ|
+for size in [2000, 4000]:
+    A = np.triu(np.random.randn(size, size))
+    np.fill_diagonal(A, np.random.permutation(np.arange(1, size + 1)))
+    t0 = time.perf_counter()
+    X = triangular_eigvecs(A)
+    t1 = time.perf_counter()
+    print(f"n={size}: triangular_eigvecs {t1 - t0:.2f}s, residual = {np.max(np.abs(A @ X - X * np.diag(A))):.2e}")
+
+# 重复 / 零特征值：分母取下界 smallnum，除法前缩放列，结果不能出现 inf / nan
+X = triangular_eigvecs(np.array([[0., 1e17], [0., 0.]]))
+assert np.all(np.isfinite(X)) and abs(abs(X[0, 1]) - 1) < 1e-12, X
+A = np.triu(np.random.randn(300, 300))
+A[[40, 150, 299], [40, 150, 299]] = 0.0
+X = triangular_eigvecs(A, nb=32)
+assert np.all(np.isfinite(X)) and np.allclose(np.linalg.norm(X, axis=0), 1), "triple zero eigenvalue"
+print(f"repeated zero eigenvalues: finite, residual = {np.max(np.abs(A @ X - X * np.diag(A))):.2e}")
+
 
 # Q5 content
 def householder(A):
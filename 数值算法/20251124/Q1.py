@@ -1,31 +1,583 @@
+import os
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# 每个线程分到的非零元个数下限，太小时线程调度开销比计算还大
+MIN_NNZ_PER_PART = 1 << 18
+
+# 磁盘文件格式：64 字节文件头 + colptr + rowind + nzval，各数组按 64 字节对齐
+CSC_MAGIC = b'CSCMAT01'
+CSC_HEADER = 64
+
+
+def index_dtype(maxval):
+    # 与 scipy.sparse 相同的下标类型约定：能用 int32 就用 int32，否则 int64
+    return np.int32 if maxval <= np.iinfo(np.int32).max else np.int64
+
+
+def segment_sum(index, values, size):
+    """
+    按下标 index 把 values 散射求和到长度 size 的数组 (bincount 只接受实数权重)。
+    bincount 总是在 float64 下累加（values 为空时甚至返回整数），结果转回 values 的类型。
+    """
+    if np.iscomplexobj(values):
+        out = (np.bincount(index, weights=values.real, minlength=size)
+               + 1j * np.bincount(index, weights=values.imag, minlength=size))
+    else:
+        out = np.bincount(index, weights=values, minlength=size)
+    return out.astype(values.dtype, copy=False)
+
+
+def segment_reduce(values, ptr):
+    """
+    对 values 按 ptr 划分的连续段（沿第 0 维）求和，空段结果为 0
+    (add.reduceat 对空段的处理不对)。values 可以是 (nnz,) 或 (nnz, k)。
+    """
+    out = np.zeros((len(ptr) - 1,) + values.shape[1:], dtype=values.dtype)
+    nonempty = ptr[:-1] < ptr[1:]
+    if nonempty.any():
+        out[nonempty] = np.add.reduceat(values, ptr[:-1][nonempty] - ptr[0], axis=0)
+    return out
+
 
 class CSCMatrix:
-    def __init__(self, nzval, rowind, colptr):
-        self.nzval=list(nzval)
-        self.rowind=list(rowind)
-        self.colptr=list(colptr)
-
-def x2ax_csc(x,A):
-    result=np.zeros_like(x)
-    val=A.nzval
-    index=A.rowind
-    ptr=A.colptr
-    track=0
-    for i in range(len(val)):
-        while i>=ptr[track]:
-            track+=1
-        result[index[i]]+=val[i]*x[ptr[track]]
+    def __init__(self, nzval, rowind, colptr, shape=None):
+        rowind = np.asarray(rowind)
+        colptr = np.asarray(colptr)
+        n = len(colptr) - 1
+        if shape is None:
+            # 旧接口没有 shape，默认方阵（与原来 zeros_like(x) 的结果长度一致）
+            m = max(n, int(rowind.max()) + 1 if len(rowind) else 0)
+            shape = (m, n)
+        self.shape = (int(shape[0]), int(shape[1]))
+        if rowind.dtype == colptr.dtype and rowind.dtype in (np.int32, np.int64):
+            idx = rowind.dtype  # 已经是合法的下标类型就直接用，保证零拷贝
+        else:
+            idx = index_dtype(max(len(rowind), *self.shape))
+        nzval = np.asarray(nzval)
+        if not np.issubdtype(nzval.dtype, np.inexact):
+            nzval = nzval.astype(np.float64)
+        self.nzval = np.ascontiguousarray(nzval)
+        self.rowind = np.ascontiguousarray(rowind, dtype=idx)
+        self.colptr = np.ascontiguousarray(colptr, dtype=idx)
+        self._colind = None
+        self._plan = None
+        self._T = None
+        # 不为 None 时 matvec/rmatvec 按列分块流式计算（用于 memmap 到磁盘的矩阵）
+        self.chunk_nnz = None
+
+    @classmethod
+    def from_coo(cls, row, col, val, shape):
+        """
+        由三元组 (row, col, val) 批量构造，重复位置的值相加。
+        """
+        row, col, val = np.asarray(row), np.asarray(col), np.asarray(val)
+        idx = index_dtype(max(len(row), *shape))
+        order = np.lexsort((row, col))
+        row, col, val = row[order].astype(idx), col[order].astype(idx), val[order]
+        if len(row):
+            first = np.ones(len(row), dtype=bool)
+            first[1:] = (row[1:] != row[:-1]) | (col[1:] != col[:-1])
+            starts = np.flatnonzero(first)
+            row, col, val = row[starts], col[starts], np.add.reduceat(val, starts)
+        colptr = np.zeros(shape[1] + 1, dtype=idx)
+        np.cumsum(np.bincount(col, minlength=shape[1]), out=colptr[1:])
+        return cls(val, row, colptr, shape=shape)
+
+    @classmethod
+    def from_scipy(cls, S):
+        """
+        从 scipy.sparse 矩阵构造；已经是 CSC 时直接共用它的 data/indices/indptr。
+        """
+        S = S.tocsc()
+        return cls(S.data, S.indices, S.indptr, shape=S.shape)
+
+    def to_scipy(self):
+        """
+        导出为 scipy.sparse.csc_matrix，与本对象共用同一块内存（不拷贝）。
+        构造函数会把 int64 下标降成 int32 而复制一份，所以先建空矩阵再直接挂上三个数组。
+        """
+        import scipy.sparse as sp
+        S = sp.csc_matrix(self.shape, dtype=self.nzval.dtype)
+        S.data, S.indices, S.indptr = self.nzval, self.rowind, self.colptr
+        return S
+
+    @property
+    def T(self):
+        """
+        A 的转置，也就是 A 的按行压缩 (CSR) 副本，第一次用到时生成并与 A 互相缓存。
+        有了它 A @ x 就可以走 A.T 的按列求和（gather），不再需要散射。
+        """
+        if self._T is None:
+            perm = np.argsort(self.rowind, kind='stable')
+            rowptr = np.zeros(self.shape[0] + 1, dtype=self.colptr.dtype)
+            np.cumsum(np.bincount(self.rowind, minlength=self.shape[0]), out=rowptr[1:])
+            AT = CSCMatrix(self.nzval[perm], self.colind[perm], rowptr,
+                           shape=(self.shape[1], self.shape[0]))
+            AT._T = self
+            self._T = AT
+        return self._T
+
+    @property
+    def nnz(self):
+        return len(self.nzval)
+
+    @property
+    def colind(self):
+        # 把 colptr 展开成每个非零元的列号，第一次用到时生成并缓存
+        if self._colind is None:
+            n = self.shape[1]
+            self._colind = np.repeat(np.arange(n, dtype=self.colptr.dtype),
+                                     np.diff(self.colptr))
+        return self._colind
+
+    def matvec(self, x):
+        # A @ x：已有 CSR 副本时按行求和，否则按列号取 x，再按行号散射求和
+        x = np.asarray(x)
+        if x.ndim == 2:
+            return self.matmat(x)
+        if self._T is not None:
+            return self._T.rmatvec(x)
+        if self.chunk_nnz is not None:
+            return self.matvec_stream(x)
+        return segment_sum(self.rowind, self.nzval * x[self.colind], self.shape[0])
+
+    def rmatvec(self, x):
+        # A.T @ x：按行号取 x，再对每一列的连续段求和
+        x = np.asarray(x)
+        if x.ndim == 2:
+            return self.rmatmat(x)
+        if self.chunk_nnz is not None:
+            return self.rmatvec_stream(x)
+        return segment_reduce(self.nzval * x[self.rowind], self.colptr)
+
+    def __matmul__(self, x):
+        return self.matvec(x)
+
+    def column_chunks(self, chunk_nnz):
+        # 每块约 chunk_nnz 个非零元的列区间
+        parts = max(1, -(-self.nnz // chunk_nnz))
+        bounds = self.column_parts(parts)
+        return zip(bounds[:-1], bounds[1:])
+
+    def matvec_stream(self, x, chunk_nnz=None):
+        """
+        A @ x，按列分块顺序读 nzval/rowind，内存里只常驻 x 和结果向量。
+        """
+        chunk_nnz = chunk_nnz or self.chunk_nnz
+        y = np.zeros(self.shape[0], dtype=np.result_type(self.nzval, x))
+        for c0, c1 in self.column_chunks(chunk_nnz):
+            ptr = np.asarray(self.colptr[c0:c1 + 1])
+            s, e = ptr[0], ptr[-1]
+            cols = np.repeat(np.arange(c0, c1), np.diff(ptr))
+            np.add.at(y, self.rowind[s:e], self.nzval[s:e] * x[cols])
+        return y
+
+    def rmatvec_stream(self, x, chunk_nnz=None):
+        """
+        A.T @ x，按列分块顺序读，每块直接得到结果中对应的一段。
+        """
+        chunk_nnz = chunk_nnz or self.chunk_nnz
+        y = np.zeros(self.shape[1], dtype=np.result_type(self.nzval, x))
+        for c0, c1 in self.column_chunks(chunk_nnz):
+            ptr = np.asarray(self.colptr[c0:c1 + 1])
+            s, e = ptr[0], ptr[-1]
+            y[c0:c1] = segment_reduce(self.nzval[s:e] * x[self.rowind[s:e]], ptr)
+        return y
+
+    def default_workers(self):
+        return max(1, min(os.cpu_count() or 1, self.nnz // MIN_NNZ_PER_PART))
+
+    def column_parts(self, parts):
+        """
+        把列切成 parts 段，使每段的非零元个数大致相等。返回列边界数组。
+        """
+        targets = np.linspace(0, self.nnz, parts + 1)
+        bounds = np.searchsorted(self.colptr, targets, side='left')
+        bounds[0], bounds[-1] = 0, self.shape[1]
+        return np.unique(bounds)
+
+    def segment_bounds(self):
+        """
+        SpMM 的列分段边界，只由矩阵决定、与线程数无关：
+        流式（memmap）矩阵每段约 chunk_nnz 个非零元，其余按 default_workers 等分。
+        """
+        parts = -(-self.nnz // self.chunk_nnz) if self.chunk_nnz else self.default_workers()
+        return self.column_parts(max(1, parts))
+
+    def segment(self, c0, c1):
+        """
+        列 [c0, c1) 的非零元按行号稳定排序后的 (c0, c1, vals, cols, urows, starts)，
+        这样散射求和就变成沿第 0 维的 add.reduceat，可以一次处理 k 个列向量。
+        """
+        s, e = self.colptr[c0], self.colptr[c1]
+        rows = np.asarray(self.rowind[s:e])
+        perm = np.argsort(rows, kind='stable')
+        urows, starts = np.unique(rows[perm], return_index=True)
+        cols = np.repeat(np.arange(c0, c1, dtype=self.colptr.dtype), np.diff(self.colptr[c0:c1 + 1]))
+        return c0, c1, np.asarray(self.nzval[s:e])[perm], cols[perm], urows, starts
+
+    def cache_plan(self):
+        """
+        把各段排好序的副本（一份，与线程数无关）常驻内存，之后 matmat 不再每次排序。
+        要多占一份 nzval 和两份下标的内存，所以需要显式调用；修改 nzval/rowind 后须 release_plan。
+        """
+        if self._plan is None:
+            bounds = self.segment_bounds()
+            self._plan = [self.segment(c0, c1) for c0, c1 in zip(bounds[:-1], bounds[1:])]
+        return self._plan
+
+    def release_plan(self):
+        # 释放 cache_plan 的副本（矩阵内容改变后也用它作废旧计划）
+        self._plan = None
+
+    def matmat(self, X, workers=None):
+        """
+        Y = A @ X，X 形状 (n, k)。对 nzval 只扫一遍；各线程处理一段列（segment_bounds），
+        得到自己那部分行的部分和，最后在主线程累加。没有 cache_plan 时每段在线程里现排序。
+        """
+        X = np.asarray(X)
+        if self._T is not None:
+            return self._T.rmatmat(X, workers)
+        workers = workers or self.default_workers()
+        Y = np.zeros((self.shape[0], X.shape[1]), dtype=np.result_type(self.nzval, X))
+
+        def kernel(part):
+            if len(part) == 2:
+                part = self.segment(*part)  # 未缓存计划：段在线程里现排序，用完即释放
+            c0, c1, vals, cols, urows, starts = part
+            return urows, gather_reduce(vals, cols, starts, X)
+
+        plan = self._plan
+        if plan is None:
+            bounds = self.segment_bounds()
+            plan = list(zip(bounds[:-1], bounds[1:]))
+        if workers == 1:
+            partials = map(kernel, plan)
+        else:
+            with ThreadPoolExecutor(workers) as pool:
+                partials = list(pool.map(kernel, plan))
+        for urows, sums in partials:
+            Y[urows] += sums
+        return Y
+
+    def rmatmat(self, X, workers=None):
+        """
+        Y = A.T @ X，X 形状 (m, k)。各段列对应 Y 中互不相交的行，线程直接写结果。
+        """
+        X = np.asarray(X)
+        workers = workers or self.default_workers()
+        Y = np.zeros((self.shape[1], X.shape[1]), dtype=np.result_type(self.nzval, X))
+
+        def kernel(c0, c1):
+            s, e = self.colptr[c0], self.colptr[c1]
+            ptr = self.colptr[c0:c1 + 1]
+            nonempty = np.flatnonzero(ptr[:-1] < ptr[1:])
+            Y[c0 + nonempty] = gather_reduce(self.nzval[s:e], self.rowind[s:e], ptr[nonempty] - s, X)
+
+        bounds = self.column_parts(workers)
+        if workers == 1:
+            kernel(0, self.shape[1])
+        else:
+            with ThreadPoolExecutor(workers) as pool:
+                list(pool.map(kernel, bounds[:-1], bounds[1:]))
+        return Y
+
+
+def gather_reduce(vals, idx, starts, X, cache_bytes=1 << 20):
+    """
+    out[g] = sum_{t in 段 g} vals[t] * X[idx[t]]，段由递增的 starts 给出且都非空。
+    按段分块处理，让 (块内非零元数 x k) 的临时数组留在缓存里；
+    一次对整段 (nnz, k) 做 reduceat 会因为内存带宽慢好几倍。
+    """
+    k = X.shape[1]
+    out = np.empty((len(starts), k), dtype=np.result_type(vals, X))
+    if len(starts) == 0:
+        return out
+    step = max(256, cache_bytes // (k * out.itemsize))
+    bounds = np.unique(np.append(np.searchsorted(starts, np.arange(0, len(vals), step)), len(starts)))
+    ends = np.append(starts[1:], len(vals))
+    for a, c in zip(bounds[:-1], bounds[1:]):
+        s, e = starts[a], ends[c - 1]
+        G = X[idx[s:e]] * vals[s:e, None]  # 按结果类型相乘，X 为整数 / float32 / 实数时不能原地乘
+        out[a:c] = np.add.reduceat(G, starts[a:c] - s, axis=0)
+    return out
+
+
+def csc_layout(shape, nnz, val_dtype, idx_dtype):
+    # 三个数组在文件中的偏移量
+    align = lambda k: -(-k // 64) * 64
+    idx_size, val_size = np.dtype(idx_dtype).itemsize, np.dtype(val_dtype).itemsize
+    off_ptr = CSC_HEADER
+    off_row = align(off_ptr + (shape[1] + 1) * idx_size)
+    off_val = align(off_row + nnz * idx_size)
+    return off_ptr, off_row, off_val, off_val + nnz * val_size
+
+
+def open_csc(path, mode='r', shape=None, nnz=None, val_dtype=np.float64, chunk_nnz=1 << 22):
+    """
+    用 np.memmap 打开磁盘上的 CSC 文件，返回数组都映射到文件的 CSCMatrix。
+    mode='w+' 时按 shape/nnz 新建文件，调用者再按列把 colptr/rowind/nzval 填进去。
+    """
+    if mode == 'w+':
+        idx_dtype = np.dtype(index_dtype(max(nnz, *shape))).newbyteorder('<')
+        val_dtype = np.dtype(val_dtype).newbyteorder('<')
+        header = np.zeros(CSC_HEADER, dtype=np.uint8)
+        header[:8] = np.frombuffer(CSC_MAGIC, dtype=np.uint8)
+        header[8:32] = np.array([shape[0], shape[1], nnz], dtype='<i8').view(np.uint8)
+        header[32:40] = np.frombuffer(val_dtype.str.encode().ljust(8), dtype=np.uint8)
+        header[40:48] = np.frombuffer(idx_dtype.str.encode().ljust(8), dtype=np.uint8)
+        end = csc_layout(shape, nnz, val_dtype, idx_dtype)[-1]
+        with open(path, 'wb') as f:
+            f.write(header.tobytes())
+            f.truncate(end)
+        mode = 'r+'
+    with open(path, 'rb') as f:
+        header = f.read(CSC_HEADER)
+    if header[:8] != CSC_MAGIC:
+        raise ValueError(f"{path} 不是 CSC 矩阵文件")
+    m, n, nnz = np.frombuffer(header[8:32], dtype='<i8').tolist()
+    val_dtype = np.dtype(header[32:40].rstrip().decode())
+    idx_dtype = np.dtype(header[40:48].rstrip().decode())
+    off_ptr, off_row, off_val, _ = csc_layout((m, n), nnz, val_dtype, idx_dtype)
+    colptr = np.memmap(path, dtype=idx_dtype, mode=mode, offset=off_ptr, shape=(n + 1,))
+    rowind = np.memmap(path, dtype=idx_dtype, mode=mode, offset=off_row, shape=(nnz,))
+    nzval = np.memmap(path, dtype=val_dtype, mode=mode, offset=off_val, shape=(nnz,))
+    A = CSCMatrix(nzval, rowind, colptr, shape=(m, n))
+    A.chunk_nnz = chunk_nnz
+    return A
+
+
+def save_csc(path, A, chunk_nnz=1 << 22):
+    """
+    把 CSCMatrix 写成 open_csc 能读的文件（按块拷贝，不额外占内存）。
+    """
+    B = open_csc(path, 'w+', shape=A.shape, nnz=A.nnz, val_dtype=A.nzval.dtype)
+    B.colptr[:] = A.colptr
+    for s in range(0, A.nnz, chunk_nnz):
+        B.rowind[s:s + chunk_nnz] = A.rowind[s:s + chunk_nnz]
+        B.nzval[s:s + chunk_nnz] = A.nzval[s:s + chunk_nnz]
+    for a in (B.colptr, B.rowind, B.nzval):
+        a.base.flush()
+    return open_csc(path, chunk_nnz=chunk_nnz)
+
+
+def tune_chunk_nnz(A, candidates=(1 << 16, 1 << 18, 1 << 20, 1 << 22, 1 << 24), repeat=2):
+    """
+    对若干块大小实测流式 A x 与 A^T x 的耗时，把最快的设为 A.chunk_nnz。
+    """
+    x = np.ones(A.shape[1])
+    y = np.ones(A.shape[0])
+    results = {}
+    for c in candidates:
+        results[c] = (best_time(lambda: A.matvec_stream(x, c), repeat),
+                      best_time(lambda: A.rmatvec_stream(y, c), repeat))
+    A.chunk_nnz = min(results, key=lambda c: sum(results[c]))
+    return results
+
+
+def x2ax_csc(x, A):
+    return A.matvec(x)
+
+
+def x2atx_csc(x, A):
+    return A.rmatvec(x)
+
+
+# 逐个非零元的纯 Python 循环，只作为基准对照
+def x2ax_csc_loop(x, A):
+    result = np.zeros(A.shape[0], dtype=np.result_type(A.nzval, x))
+    val, index, ptr = A.nzval.tolist(), A.rowind.tolist(), A.colptr.tolist()
+    for j in range(A.shape[1]):
+        for i in range(ptr[j], ptr[j + 1]):
+            result[index[i]] += val[i] * x[j]
     return result
 
-def x2atx_csc(x,A):
-    result=np.zeros_like(x)
-    val=A.nzval
-    index=A.rowind
-    ptr=A.colptr
-    track=0
-    for i in range(len(val)):
-        while i>=ptr[track]:
-            track+=1
-        result[ptr[track]]+=val[i]*x[index[i]]
-    return result
\ No newline at end of file
+
+def x2atx_csc_loop(x, A):
+    result = np.zeros(A.shape[1], dtype=np.result_type(A.nzval, x))
+    val, index, ptr = A.nzval.tolist(), A.rowind.tolist(), A.colptr.tolist()
+    for j in range(A.shape[1]):
+        for i in range(ptr[j], ptr[j + 1]):
+            result[j] += val[i] * x[index[i]]
+    return result
+
+
+def best_time(f, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_matvec(sizes=(10**4, 10**5, 10**6), density_per_col=10, loop_max_nnz=10**6, seed=0):
+    """
+    比较三种实现的吞吐量 (非零元/秒)：纯 Python 循环、向量化 CSCMatrix、scipy.sparse。
+    """
+    import scipy.sparse as sp
+    rng = np.random.default_rng(seed)
+    print(f"{'n':>9} {'nnz':>10} {'kernel':>6} {'loop':>10} {'numpy':>10} {'scipy':>10}  (Mnnz/s)")
+    for n in sizes:
+        S = sp.random(n, n, density=density_per_col / n, format='csc', random_state=rng)
+        A = CSCMatrix(S.data, S.indices, S.indptr, shape=S.shape)
+        x = rng.standard_normal(n)
+        assert np.allclose(A @ x, S @ x) and np.allclose(A.rmatvec(x), S.T @ x)
+        for name, ours, loop, ref in [('Ax', A.matvec, x2ax_csc_loop, lambda v: S @ v),
+                                      ('ATx', A.rmatvec, x2atx_csc_loop, lambda v: S.T @ v)]:
+            rate = lambda t: A.nnz / t / 1e6
+            t_loop = best_time(lambda: loop(x, A), repeat=1) if A.nnz <= loop_max_nnz else np.nan
+            t_np = best_time(lambda: ours(x))
+            t_sp = best_time(lambda: ref(x))
+            print(f"{n:>9} {A.nnz:>10} {name:>6} {rate(t_loop):>10.2f} {rate(t_np):>10.2f} {rate(t_sp):>10.2f}")
+
+
+def bench_spmm(n=200000, density_per_col=20, k=64, workers_list=None, seed=0):
+    """
+    同一个矩阵作用在 k 个向量上：逐列 matvec 与一次 SpMM 的对比，
+    以及 SpMM 的线程数-加速比。
+    """
+    import scipy.sparse as sp
+    rng = np.random.default_rng(seed)
+    S = sp.random(n, n, density=density_per_col / n, format='csc', random_state=rng)
+    A = CSCMatrix(S.data, S.indices, S.indptr, shape=S.shape)
+    X = rng.standard_normal((n, k))
+    assert np.allclose(A.matmat(X, workers=2), S @ X)
+    assert np.allclose(A.rmatmat(X, workers=2), S.T @ X)
+    t_cols = best_time(lambda: [A.matvec(X[:, j]) for j in range(k)], repeat=1)
+    print(f"n={n}, nnz={A.nnz}, k={k}, cores={os.cpu_count()}")
+    print(f"k x matvec: {t_cols:.3f}s")
+    if workers_list is None:
+        workers_list = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    base = {}
+    A.cache_plan()  # 分段计划只建一次，不计入时间；与线程数无关，所有 workers 共用
+    for w in workers_list:
+        for name, f in [('AX', A.matmat), ('ATX', A.rmatmat)]:
+            t = best_time(lambda: f(X, workers=w))
+            base.setdefault(name, t)
+            print(f"{name:>4} workers={w:>2}: {t:.3f}s  {A.nnz * k / t / 1e6:8.1f} M(nnz*k)/s"
+                  f"  speedup={base[name] / t:.2f}")
+    A.release_plan()
+
+
+def bench_alternating(n=10**6, density_per_col=10, steps=20, seed=0):
+    """
+    迭代法里交替做 A x 与 A^T y：散射版本与带 CSR 副本的 gather 版本对比。
+    """
+    rng = np.random.default_rng(seed)
+    nnz = n * density_per_col
+    A = CSCMatrix.from_coo(rng.integers(0, n, nnz), rng.integers(0, n, nnz),
+                           rng.standard_normal(nnz), shape=(n, n))
+    x = rng.standard_normal(n)
+
+    def run(B):
+        v = x
+        for _ in range(steps):
+            v = B.rmatvec(B @ v)
+            v /= np.linalg.norm(v)
+        return v
+
+    t_scatter = best_time(lambda: run(A), repeat=1)
+    t_build = best_time(lambda: A.T, repeat=1)
+    t_gather = best_time(lambda: run(A), repeat=1)
+    print(f"n={n}, nnz={A.nnz}, {steps} x (A x, A^T y)")
+    print(f"scatter: {t_scatter:.3f}s, gather with CSR twin: {t_gather:.3f}s (+{t_build:.3f}s to build)")
+
+
+def bench_stream(path='csc_bench.bin', n=2 * 10**6, nnz_per_col=50, seed=0):
+    """
+    在磁盘上生成一个 n x n、每列 nnz_per_col 个非零元的 CSC 文件（分块写入），
+    调块大小并报告流式 A x / A^T x 的吞吐量。第二次读通常命中页缓存。
+    """
+    rng = np.random.default_rng(seed)
+    nnz = n * nnz_per_col
+    A = open_csc(path, 'w+', shape=(n, n), nnz=nnz)
+    A.colptr[:] = np.arange(0, nnz + 1, nnz_per_col)
+    step = 1 << 22
+    for s in range(0, nnz, step):
+        e = min(nnz, s + step)
+        A.rowind[s:e] = rng.integers(0, n, e - s)
+        A.nzval[s:e] = rng.standard_normal(e - s)
+    A.nzval.base.flush()
+    A = open_csc(path)
+    nbytes = os.path.getsize(path)
+    print(f"file {path}: n={n}, nnz={nnz}, {nbytes / 2**30:.2f} GiB")
+    for c, (t_ax, t_atx) in tune_chunk_nnz(A, repeat=1).items():
+        print(f"chunk_nnz={c:>9}: Ax {nnz / t_ax / 1e6:7.1f} Mnnz/s ({nbytes / t_ax / 2**20:7.1f} MiB/s), "
+              f"ATx {nnz / t_atx / 1e6:7.1f} Mnnz/s")
+    print(f"chosen chunk_nnz={A.chunk_nnz}")
+    del A
+    os.remove(path)
+
+
+def check_mixed_dtypes(m=300, n=200, k=5, seed=0):
+    # 矩阵与 X 类型不同时（复数 A 乘实数 X、整数 X、float32 与 float64 混合），
+    # matvec/rmatvec/matmat/rmatmat（包括走 CSR 副本的路径）的结果类型和数值都应与 scipy 一致
+    import scipy.sparse as sp
+    rng = np.random.default_rng(seed)
+    S = sp.random(m, n, density=0.05, format='csc', random_state=seed)
+    for a_dtype, x_dtype in ((np.complex128, np.float64), (np.float64, np.int64), (np.float64, np.float32),
+                             (np.float32, np.float64), (np.float32, np.float32)):
+        B = S.astype(a_dtype)
+        if np.dtype(a_dtype).kind == 'c':
+            B = B + 1j * S
+        A, A_csr = CSCMatrix.from_scipy(B), CSCMatrix.from_scipy(B)
+        A_csr.T  # 生成 CSR 副本后 A @ x 改走按行求和
+        ops = [(A.matmat, B, n, 2), (A.rmatmat, B.T, m, 2), (A.matvec, B, n, 1), (A.rmatvec, B.T, m, 1),
+               (A_csr.matvec, B, n, 1), (A_csr.matmat, B, n, 2)]
+        for op, ref, rows, ndim in ops:
+            X = (rng.standard_normal((rows, k)[:ndim]) * 10).astype(x_dtype)
+            Y = op(X, workers=2) if ndim == 2 else op(X)
+            expect = ref @ X.astype(np.result_type(a_dtype, x_dtype))
+            assert Y.dtype == np.result_type(a_dtype, x_dtype), (op.__name__, a_dtype, x_dtype, Y.dtype)
+            tol = 1e-12 if np.finfo(Y.dtype).eps < 1e-10 else 1e-5
+            assert np.abs(Y - expect).max() <= tol * np.abs(expect).max(), (op.__name__, a_dtype, x_dtype)
+    E = CSCMatrix(np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32), np.zeros(4, dtype=np.int32), shape=(3, 3))
+    assert (E @ np.ones(3, dtype=np.float32)).dtype == np.float32
+    print("混合类型 matvec/rmatvec/matmat/rmatmat 检查通过")
+
+
+def check_plan(seed=0):
+    # 缓存计划与现排序结果一致；release_plan 后按新的 nzval 重新计算；流式矩阵按 chunk_nnz 分段
+    import scipy.sparse as sp
+    rng = np.random.default_rng(seed)
+    S = sp.random(500, 400, density=0.05, format='csc', random_state=seed)
+    A = CSCMatrix.from_scipy(S.copy())
+    X = rng.standard_normal((400, 3))
+    Y = A.matmat(X, workers=3)
+    A.cache_plan()
+    assert np.allclose(A.matmat(X, workers=1), Y) and np.allclose(A.matmat(X, workers=4), Y)
+    A.nzval *= 2
+    A.release_plan()
+    assert np.allclose(A.matmat(X, workers=2), 2 * Y)
+    A.chunk_nnz = 1000
+    assert len(A.segment_bounds()) - 1 == -(-A.nnz // 1000) and np.allclose(A.matmat(X, workers=2), 2 * Y)
+    print("SpMM 分段计划检查通过")
+
+
+def check_zero_copy(seed=0):
+    # to_scipy / from_scipy 不复制数组，包括旧接口 (list, list, list) 得到的 int64 下标
+    import scipy.sparse as sp
+    A = CSCMatrix([1.0, 2.0, 3.0], [0, 2, 1], [0, 1, 2, 3])
+    S = sp.random(300, 200, density=0.05, format='csc', random_state=seed)
+    for M in (A, CSCMatrix.from_scipy(S), CSCMatrix.from_scipy(S.astype(np.float32))):
+        T = M.to_scipy()
+        assert all(np.shares_memory(a, b) for a, b in
+                   ((T.data, M.nzval), (T.indices, M.rowind), (T.indptr, M.colptr))), M.rowind.dtype
+        x = np.arange(M.shape[1], dtype=float)
+        assert np.allclose(T @ x, M @ x)
+    B = CSCMatrix.from_scipy(S)
+    assert np.shares_memory(B.nzval, S.data) and np.shares_memory(B.rowind, S.indices)
+    print("to_scipy / from_scipy 零拷贝检查通过")
+
+
+if __name__ == "__main__":
+    check_zero_copy()
+    check_plan()
+    check_mixed_dtypes()
+    bench_matvec()
+    bench_spmm()
+    bench_alternating()
+    bench_stream()
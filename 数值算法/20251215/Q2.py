@@ -1,12 +1,32 @@
+import os
+import sys
+
 import numpy as np
+import scipy.sparse as sp
 from scipy.sparse.linalg import eigsh, LinearOperator
 from scipy.linalg import cholesky
 
+# 矩阵指纹与分解缓存各次作业共用，见 ../factor_cache.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from factor_cache import FactorCache, fingerprint
+
+
+_factor_cache = FactorCache()
+
+
+def cholesky_factor(B, cache=_factor_cache, fp=None):
+    """B = L L^H 的下三角因子，经 cache 复用；B 可以是稠密或 scipy.sparse 矩阵"""
+    def factor():
+        return np.linalg.cholesky(B.toarray() if sp.issparse(B) else np.asarray(B))
+    if cache is None:
+        return factor()
+    return cache.get((fp or fingerprint(B), "cholesky", 0j), factor)
 
-def solve_ab_eig(A, B, k=5):
-    # A, B 为 scipy.sparse 矩阵
-    # 1. Cholesky 分解 B = L @ L.H
-    L = np.linalg.cholesky(B)
+
+def solve_ab_eig(A, B, k=5, cache=_factor_cache, fp=None):
+    # A, B 为 scipy.sparse 或稠密矩阵
+    # 1. Cholesky 分解 B = L @ L.H（同一个 B 的分解从缓存取）
+    L = cholesky_factor(B, cache, fp)
     # 2. 定义算子 M = L.H @ A @ L,
     # AB 的特征值等同于 M 的特征值
     def matvec(v):
@@ -16,4 +36,26 @@ def solve_ab_eig(A, B, k=5):
 
     # 3. Lanczos 计算最大 k 个特征值
     vals, _ = eigsh(M_op, k=k, which='LM')
-    return vals
\ No newline at end of file
+    return vals
+
+
+if __name__ == "__main__":
+    import time
+
+    # 参数扫描：B 固定，A(t) = A0 + t * D 变化，B 的 Cholesky 只算一次
+    rng = np.random.default_rng(0)
+    n = 1500
+    G = rng.standard_normal((n, n)) / np.sqrt(n)
+    B = G @ G.T + np.eye(n)
+    A0 = sp.random(n, n, density=0.002, random_state=1)
+    A0 = A0 + A0.T
+    D = sp.diags(rng.random(n))
+    fp = fingerprint(B)
+    for cache in (None, _factor_cache):
+        t0 = time.perf_counter()
+        for t in np.linspace(0, 1, 10):
+            vals = solve_ab_eig(A0 + t * D, B, k=3, cache=cache, fp=fp)
+        label = "无缓存" if cache is None else f"缓存 {cache.stats()}"
+        print(f"{label}: {time.perf_counter() - t0:.3f}s, 最后一组特征值 {np.sort(vals)}")
+    ref = np.linalg.eigvals((A0 + D).toarray() @ B)
+    print("与稠密 eig 对比:", np.sort(ref.real[np.argsort(-np.abs(ref))[:3]]))
@@ -0,0 +1,80 @@
+"""各次作业共用的矩阵指纹与分解缓存。
+
+fingerprint 给出矩阵指纹（稀疏矩阵与存储格式无关）；FactorCache 按 (指纹, 分解类型, 位移) 缓存分解，LRU 淘汰。
+作业目录下的脚本把本目录加入 sys.path 后 from factor_cache import ... 使用。
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def fingerprint(A):
+    """矩阵指纹：形状、类型 + 内容哈希，用于缓存分解。
+    scipy.sparse 各格式和 CSCMatrix（有 to_scipy 方法）按规范 CSR 形式（下标有序、无重复）哈希，
+    同一稀疏矩阵换存储格式指纹不变；稠密数组直接哈希数据缓冲区，不构造 CSR 副本。
+    稠密与稀疏的同一矩阵指纹不同（分解方式本来就不同）。不改动传入的矩阵。"""
+    h = hashlib.blake2b(digest_size=16)
+    if hasattr(A, 'to_scipy'):
+        A = A.to_scipy()
+    if not sp.issparse(A):
+        A = np.asarray(A)
+        h.update(repr(('dense', A.shape, str(A.dtype))).encode())
+        h.update(np.ascontiguousarray(A).data)
+        return h.hexdigest()
+    A = A.tocsr()
+    if not A.has_canonical_format:
+        A = A.copy()
+        A.sum_duplicates()
+    h.update(repr(('sparse', A.shape, str(A.dtype))).encode())
+    for a in (A.indptr.astype(np.int64, copy=False), A.indices.astype(np.int64, copy=False), A.data):
+        h.update(np.ascontiguousarray(a).data)
+    return h.hexdigest()
+
+
+def _nbytes(obj):
+    # 数组及其元组 / 列表直接累加；其他对象（如预条件子）用自己给出的 nbytes 属性
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sum(_nbytes(o) for o in obj)
+    return int(getattr(obj, 'nbytes', 0))
+
+
+class FactorCache:
+    """按 (矩阵指纹, 分解类型, 位移) 缓存分解，LRU 淘汰，缓存数组总字节数不超过 max_bytes。
+    hits / misses / evictions 记录命中情况；单个超过预算的分解不进缓存。"""
+
+    def __init__(self, max_bytes=256 << 20):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, factory):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+        self.misses += 1
+        value = factory()
+        size = _nbytes(value)
+        if size <= self.max_bytes:
+            self._data[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, old) = self._data.popitem(last=False)
+                self.nbytes -= old
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0, "entries": len(self._data), "nbytes": self.nbytes}
+
+    def clear(self):
+        self._data.clear()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0